@@ -4,3 +4,18 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "api"
+
+    def ready(self):
+        from django.conf import settings
+        from django.core.signals import request_finished, request_started
+        from django.db.backends.signals import connection_created
+
+        from . import checks, signals  # noqa: F401
+        from .db import close_unusable_connections, mark_connections_released
+        from .metrics import install_query_recorder
+
+        connection_created.connect(install_query_recorder)
+
+        if settings.DB_HEALTH_CHECKS:
+            request_started.connect(close_unusable_connections)
+            request_finished.connect(mark_connections_released)
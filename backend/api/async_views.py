@@ -0,0 +1,115 @@
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import get_conditional_response
+
+from .cache import (
+    get_cached_feed_page,
+    get_feed_cache_key,
+    is_feed_cacheable,
+)
+from .catalog import ingredient_catalog, tag_catalog
+from .renderers import ORJSONRenderer
+from .representations import ingredient_representation, tag_representation
+from .views import is_not_modified, set_validators
+
+
+def json_response(data):
+    response = HttpResponse(
+        ORJSONRenderer().render(data), content_type="application/json"
+    )
+    response["Vary"] = "Accept"
+    return response
+
+
+def recipe_feed(request):
+    if not is_feed_cacheable(request):
+        return None
+    page = get_cached_feed_page(get_feed_cache_key(request))
+    if page is None:
+        return None
+    etag, data = page
+    response = get_conditional_response(request, etag=etag) or json_response(
+        data
+    )
+    return set_validators(response, etag)
+
+
+def catalog_list(catalog, representation):
+    def fast_path(request):
+        if request.GET:
+            return None
+        state = catalog.get_current_state()
+        if state is None:
+            return None
+        if is_not_modified(request, state.etag):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(
+                state.render(representation), content_type="application/json"
+            )
+        response["ETag"] = state.etag
+        return response
+
+    return fast_path
+
+
+def catalog_detail(catalog, representation):
+    def fast_path(request, pk):
+        state = catalog.get_current_state()
+        if state is None or not pk.isdigit() or int(pk) not in state.by_id:
+            return None
+        if is_not_modified(request, state.etag):
+            response = HttpResponseNotModified()
+        else:
+            response = json_response(
+                representation.from_object(state.by_id[int(pk)])
+            )
+        response["ETag"] = state.etag
+        return response
+
+    return fast_path
+
+
+FAST_PATHS = {
+    "recipe-list": recipe_feed,
+    "ingredient-list": catalog_list(
+        ingredient_catalog, ingredient_representation
+    ),
+    "ingredient-detail": catalog_detail(
+        ingredient_catalog, ingredient_representation
+    ),
+    "tag-list": catalog_list(tag_catalog, tag_representation),
+    "tag-detail": catalog_detail(tag_catalog, tag_representation),
+}
+
+
+def is_anonymous_json_get(request, kwargs):
+    return (
+        request.method == "GET"
+        and "format" not in kwargs
+        and "Authorization" not in request.headers
+        and "text/html" not in request.headers.get("Accept", "")
+    )
+
+
+def async_read_view(view, fast_path):
+    sync_view = sync_to_async(view)
+    cached_view = sync_to_async(fast_path, thread_sensitive=False)
+
+    async def async_view(request, *args, **kwargs):
+        if is_anonymous_json_get(request, kwargs):
+            response = await cached_view(request, *args, **kwargs)
+            if response is not None:
+                return response
+        return await sync_view(request, *args, **kwargs)
+
+    async_view.csrf_exempt = True
+    return async_view
+
+
+def async_read_urls(patterns):
+    for pattern in patterns:
+        fast_path = FAST_PATHS.get(pattern.name)
+        if fast_path is not None:
+            pattern.callback = async_read_view(pattern.callback, fast_path)
+    return patterns
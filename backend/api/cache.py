@@ -0,0 +1,111 @@
+import hashlib
+
+from django.conf import settings
+
+from .caching import feed_cache, recipe_cache
+from .catalog import ingredient_catalog, tag_catalog
+from .db import primary_reads
+from .metrics import record_serialization
+
+FEED_QUERY_PARAMS = ("page", "limit", "cursor", "count", "tags", "author")
+
+
+def invalidate_feed():
+    feed_cache.bump_version()
+
+
+def get_feed_cache_key(request):
+    params = request.GET
+    return feed_cache.make_key(
+        "list",
+        request.get_host(),
+        *(
+            ",".join(sorted(params.getlist(param)))
+            for param in FEED_QUERY_PARAMS
+        ),
+    )
+
+
+def is_feed_cacheable(request):
+    return set(request.GET).issubset(FEED_QUERY_PARAMS)
+
+
+def get_cached_feed_page(key):
+    return feed_cache.get(key)
+
+
+def get_feed_page(key, build):
+    def build_from_primary():
+        with primary_reads():
+            return build()
+
+    return feed_cache.get_or_compute(
+        key, build_from_primary, settings.FEED_CACHE_TIMEOUT
+    )
+
+
+def get_catalog_versions():
+    return f"{tag_catalog.get_version()}.{ingredient_catalog.get_version()}"
+
+
+def get_recipe_etag(recipes, *parts):
+    digest = hashlib.md5(get_catalog_versions().encode())
+    for part in parts:
+        digest.update(f"|{part}".encode())
+    for recipe in recipes:
+        digest.update(
+            f"|{recipe.id}.{recipe.version}."
+            f"{recipe.is_favorited:d}{recipe.is_in_shopping_cart:d}"
+            f"{recipe.author_is_subscribed:d}".encode()
+        )
+    return f'"{digest.hexdigest()}"'
+
+
+def get_recipe_cache_prefix(request, variant):
+    return recipe_cache.make_key(
+        "representation", variant, request.get_host(), get_catalog_versions()
+    )
+
+
+def strip_recipe_flags(data):
+    data["is_favorited"] = False
+    data["is_in_shopping_cart"] = False
+    if data["author"] is not None:
+        data["author"]["is_subscribed"] = False
+    return data
+
+
+def apply_recipe_flags(data, recipe):
+    data["is_favorited"] = bool(recipe.is_favorited)
+    data["is_in_shopping_cart"] = bool(recipe.is_in_shopping_cart)
+    if data["author"] is not None:
+        data["author"]["is_subscribed"] = bool(recipe.author_is_subscribed)
+    return data
+
+
+@record_serialization
+def get_recipe_representations(request, recipes, variant, serialize):
+    prefix = get_recipe_cache_prefix(request, variant)
+    keys = {
+        recipe.id: f"{prefix}:{recipe.id}:{recipe.version}"
+        for recipe in recipes
+    }
+    representations = recipe_cache.get_many(keys.values())
+
+    missing = [
+        recipe for recipe in recipes if keys[recipe.id] not in representations
+    ]
+    if missing:
+        with primary_reads():
+            serialized = serialize(missing)
+        fresh = {
+            keys[recipe.id]: strip_recipe_flags(data)
+            for recipe, data in zip(missing, serialized)
+        }
+        recipe_cache.set_many(fresh, settings.RECIPE_CACHE_TIMEOUT)
+        representations.update(fresh)
+
+    return [
+        apply_recipe_flags(representations[keys[recipe.id]], recipe)
+        for recipe in recipes
+    ]
@@ -0,0 +1,207 @@
+import math
+import random
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+
+CACHE_EVENTS = ("hits", "misses", "early", "stale", "coalesced")
+
+
+def is_shared_cache():
+    return not isinstance(caches["default"], LocMemCache)
+
+
+def incr_counter(key, count):
+    try:
+        cache.incr(key, count)
+    except ValueError:
+        if not cache.add(key, count, timeout=None):
+            cache.incr(key, count)
+
+
+class CacheStats:
+    def __init__(self):
+        self._counts = defaultdict(int)
+        self._lock = threading.Lock()
+        self._flushed_at = time.monotonic()
+
+    def get_key(self, namespace, event):
+        return f"stats:{namespace}:{event}"
+
+    def record(self, namespace, event, count=1):
+        with self._lock:
+            self._counts[namespace, event] += count
+            due = (
+                time.monotonic() - self._flushed_at
+                >= settings.CACHE_STATS_FLUSH_INTERVAL
+            )
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            counts, self._counts = self._counts, defaultdict(int)
+            self._flushed_at = time.monotonic()
+        for (namespace, event), count in counts.items():
+            incr_counter(self.get_key(namespace, event), count)
+
+    def read(self, namespaces):
+        keys = {
+            self.get_key(namespace, event): (namespace, event)
+            for namespace in namespaces
+            for event in CACHE_EVENTS
+        }
+        values = cache.get_many(keys)
+        counts = {
+            namespace: dict.fromkeys(CACHE_EVENTS, 0)
+            for namespace in namespaces
+        }
+        for key, count in values.items():
+            namespace, event = keys[key]
+            counts[namespace][event] = count
+        return counts
+
+    def reset(self, namespaces):
+        with self._lock:
+            self._counts.clear()
+        cache.delete_many(
+            [
+                self.get_key(namespace, event)
+                for namespace in namespaces
+                for event in CACHE_EVENTS
+            ]
+        )
+
+
+cache_stats = CacheStats()
+
+
+class CacheNamespace:
+    def __init__(self, name):
+        self.name = name
+        self.versions = {()}
+
+    def key(self, *parts):
+        return ":".join((self.name, *map(str, parts)))
+
+    def get_version(self, *parts):
+        return cache.get_or_set(
+            self.key(*parts, "version"), time.time_ns(), timeout=None
+        )
+
+    def bump_version(self, *parts):
+        key = self.key(*parts, "version")
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+
+    def add_version(self, *parts):
+        self.versions.add(parts)
+
+    def clear(self):
+        for parts in self.versions:
+            self.bump_version(*parts)
+
+    def make_key(self, *parts):
+        return self.key(self.get_version(), *parts)
+
+    def record(self, event, count=1):
+        cache_stats.record(self.name, event, count)
+
+    def is_due(self, entry):
+        _, expires_at, delta = entry
+        return (
+            time.time()
+            - delta
+            * settings.CACHE_EARLY_RECOMPUTE_BETA
+            * math.log(1 - random.random())
+            >= expires_at
+        )
+
+    def wrap(self, value, timeout, delta=0):
+        expires_at = math.inf if timeout is None else time.time() + timeout
+        return value, expires_at, delta
+
+    def get(self, key):
+        entry = cache.get(key)
+        if entry is None or self.is_due(entry):
+            self.record("misses")
+            return None
+        self.record("hits")
+        return entry[0]
+
+    def get_many(self, keys):
+        entries = cache.get_many(keys)
+        values = {key: entry[0] for key, entry in entries.items()}
+        if values:
+            self.record("hits", len(values))
+        if len(values) < len(keys):
+            self.record("misses", len(keys) - len(values))
+        return values
+
+    def set(self, key, value, timeout):
+        cache.set(key, self.wrap(value, timeout), timeout)
+
+    def set_many(self, values, timeout):
+        cache.set_many(
+            {key: self.wrap(value, timeout) for key, value in values.items()},
+            timeout,
+        )
+
+    def delete(self, key):
+        cache.delete(key)
+
+    def wait(self, key):
+        deadline = time.monotonic() + settings.CACHE_LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(settings.CACHE_LOCK_POLL_INTERVAL)
+            entry = cache.get(key)
+            if entry is not None:
+                return entry
+        return None
+
+    def get_or_compute(self, key, compute, timeout):
+        entry = cache.get(key)
+        if entry is not None and not self.is_due(entry):
+            self.record("hits")
+            return entry[0]
+
+        lock_key = f"{key}:lock"
+        locked = cache.add(lock_key, 1, settings.CACHE_LOCK_TIMEOUT)
+        if not locked:
+            if entry is not None:
+                self.record("stale")
+                return entry[0]
+            entry = self.wait(key)
+            if entry is not None:
+                self.record("coalesced")
+                return entry[0]
+
+        self.record("misses" if entry is None else "early")
+        try:
+            started = time.monotonic()
+            value = compute()
+            cache.set(
+                key,
+                self.wrap(value, timeout, time.monotonic() - started),
+                timeout,
+            )
+        finally:
+            if locked:
+                cache.delete(lock_key)
+        return value
+
+
+catalog_cache = CacheNamespace("catalogs")
+feed_cache = CacheNamespace("feed")
+recipe_cache = CacheNamespace("recipes")
+
+CACHE_NAMESPACES = {
+    namespace.name: namespace
+    for namespace in (catalog_cache, feed_cache, recipe_cache)
+}
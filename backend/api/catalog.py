@@ -0,0 +1,102 @@
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from recipes.models import Ingredient, Tag
+
+from .caching import catalog_cache
+from .db import primary_reads
+from .renderers import ORJSONRenderer
+
+
+def get_digest(objects):
+    digest = hashlib.md5()
+    for obj in objects:
+        digest.update(
+            repr(
+                [
+                    getattr(obj, field.attname)
+                    for field in obj._meta.concrete_fields
+                ]
+            ).encode()
+        )
+    return digest.hexdigest()[:16]
+
+
+class CatalogState:
+    def __init__(self, name, version, objects):
+        self.version = version
+        self.objects = objects
+        self.loaded_at = time.monotonic()
+        self.by_id = {obj.id: obj for obj in objects}
+        self.etag = f'"{name}-{get_digest(objects)}"'
+        self._content = {}
+        self._maps = {}
+
+    def is_current(self, version, max_age=None):
+        if max_age is None:
+            max_age = settings.CATALOG_STATE_TIMEOUT
+        return (
+            self.version == version
+            and time.monotonic() - self.loaded_at < max_age
+        )
+
+    def by_field(self, field):
+        mapping = self._maps.get(field)
+        if mapping is None:
+            mapping = {getattr(obj, field): obj for obj in self.objects}
+            self._maps[field] = mapping
+        return mapping
+
+    def render(self, representation):
+        content = self._content.get(representation)
+        if content is None:
+            data = [representation.from_object(obj) for obj in self.objects]
+            content = ORJSONRenderer().render(data)
+            self._content[representation] = content
+        return content
+
+
+class Catalog:
+    def __init__(self, model):
+        self.model = model
+        self.name = model._meta.model_name
+        catalog_cache.add_version(self.name)
+        self._state = None
+        self._lock = threading.Lock()
+
+    def get_version(self):
+        return catalog_cache.get_version(self.name)
+
+    def bump_version(self):
+        catalog_cache.bump_version(self.name)
+
+    def get_state(self, max_age=None):
+        version = self.get_version()
+        state = self._state
+        if state is None or not state.is_current(version, max_age):
+            with self._lock:
+                state = self._state
+                if state is None or not state.is_current(version, max_age):
+                    catalog_cache.record("misses")
+                    with primary_reads():
+                        objects = list(self.model.objects.all())
+                    state = CatalogState(self.name, version, objects)
+                    self._state = state
+                    return state
+        catalog_cache.record("hits")
+        return state
+
+    def get_current_state(self):
+        state = self._state
+        if state is not None and state.is_current(self.get_version()):
+            return state
+        return None
+
+    def get(self, pk):
+        return self.get_state().by_id.get(pk)
+
+
+ingredient_catalog = Catalog(Ingredient)
+tag_catalog = Catalog(Tag)
@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+from .caching import is_shared_cache
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    if settings.SERVER_INTERFACE != "asgi" or is_shared_cache():
+        return []
+    return [
+        Warning(
+            "Кеш locmem не разделяется между процессами: воркеры uvicorn "
+            "и фоновые задачи не видят сбросов кеша друг друга.",
+            hint="Задайте CACHE_BACKEND=redis и CACHE_LOCATION.",
+            id="api.W001",
+        )
+    ]
@@ -0,0 +1,57 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA_DB_ALIAS = "replica"
+
+replica_reads = ContextVar("replica_reads", default=False)
+
+
+@contextmanager
+def primary_reads():
+    token = replica_reads.set(False)
+    try:
+        yield
+    finally:
+        replica_reads.reset(token)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if (
+            replica_reads.get()
+            and REPLICA_DB_ALIAS in settings.DATABASES
+            and not connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return REPLICA_DB_ALIAS
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+def mark_connections_released(**kwargs):
+    released_at = time.monotonic()
+    for connection in connections.all():
+        connection.released_at = released_at
+
+
+def close_unusable_connections(**kwargs):
+    now = time.monotonic()
+    for connection in connections.all():
+        if (
+            connection.connection is not None
+            and now - getattr(connection, "released_at", now)
+            >= settings.DB_HEALTH_CHECK_IDLE
+            and not connection.is_usable()
+        ):
+            connection.close()
@@ -0,0 +1,21 @@
+from recipes.images import InvalidImage, decode_base64_image
+from rest_framework.fields import ImageField
+
+
+class RecipeImageField(ImageField):
+    def __init__(self, thumbnail=False, **kwargs):
+        self.thumbnail = thumbnail
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if not isinstance(data, str):
+            self.fail("invalid_image")
+        try:
+            return decode_base64_image(data)
+        except InvalidImage:
+            self.fail("invalid_image")
+
+    def get_attribute(self, instance):
+        if self.thumbnail:
+            return instance.thumbnail or instance.image
+        return super().get_attribute(instance)
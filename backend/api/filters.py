@@ -1,23 +1,33 @@
 from django.contrib.auth import get_user_model
+from django.db.models import Exists, OuterRef
 from django_filters.rest_framework import FilterSet, filters
-from recipes.models import Ingredient, Recipe, Tag
+from recipes.models import Ingredient, Recipe
+
+from .catalog import tag_catalog
+from .search import search_ingredients
 
 User = get_user_model()
 
 
+def get_tag_choices():
+    tags = tag_catalog.get_state().by_field("slug")
+    return [(slug, tag.name) for slug, tag in tags.items()]
+
+
 class IngredientFilter(FilterSet):
-    name = filters.CharFilter(lookup_expr="icontains")
+    name = filters.CharFilter(method="filter_name")
 
     class Meta:
         model = Ingredient
         fields = ["name"]
 
+    def filter_name(self, queryset, name, value):
+        return search_ingredients(queryset, value)
+
 
 class RecipeFilter(FilterSet):
-    tags = filters.ModelMultipleChoiceFilter(
-        field_name="tags__slug",
-        to_field_name="slug",
-        queryset=Tag.objects.all(),
+    tags = filters.MultipleChoiceFilter(
+        choices=get_tag_choices, method="filter_tags"
     )
 
     is_favorited = filters.BooleanFilter(method="filter_is_favorited")
@@ -32,6 +42,17 @@ class RecipeFilter(FilterSet):
             "author",
         )
 
+    def filter_tags(self, queryset, name, value):
+        tags = tag_catalog.get_state().by_field("slug")
+        tag_ids = [tags[slug].id for slug in value if slug in tags]
+        return queryset.filter(
+            Exists(
+                Recipe.tags.through.objects.filter(
+                    recipe_id=OuterRef("pk"), tag_id__in=tag_ids
+                )
+            )
+        )
+
     def filter_is_favorited(self, queryset, name, value):
         user = self.request.user
         if value and not user.is_anonymous:
@@ -0,0 +1,249 @@
+import asyncio
+import json
+import math
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from api.caching import CACHE_NAMESPACES
+from api.catalog import ingredient_catalog, tag_catalog  # noqa: F401
+from api.metrics import RequestRecorder
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.db.models import Count
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from recipes.models import Ingredient
+from rest_framework.authtoken.models import Token
+
+User = get_user_model()
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    index = max(math.ceil(len(ordered) * percent / 100) - 1, 0)
+    return ordered[index]
+
+
+def environ_headers(headers):
+    return {
+        f"HTTP_{name.upper().replace('-', '_')}": value
+        for name, value in headers.items()
+    }
+
+
+def split(total, parts):
+    return [total // parts + (part < total % parts) for part in range(parts)]
+
+
+class Command(BaseCommand):
+    help = "Measure latency, query count and memory of the main endpoints"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument("--user", help="Email of the benchmark user")
+        parser.add_argument("--save", help="Write results to a JSON file")
+        parser.add_argument(
+            "--baseline", help="Compare results with a saved JSON file"
+        )
+        parser.add_argument(
+            "--max-regression",
+            type=float,
+            help="Fail if p95 grows by more than this many percent",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=0,
+            help="Also measure throughput with this many parallel clients",
+        )
+
+    def handle(self, *args, **options):
+        user = self.get_user(options["user"])
+        scenarios = self.get_scenarios(user)
+
+        results = {}
+        with override_settings(ALLOWED_HOSTS=["testserver"]):
+            for name, (headers, path) in scenarios.items():
+                results[name] = self.measure(
+                    Client(**environ_headers(headers)),
+                    path,
+                    options["iterations"],
+                    options["warmup"],
+                )
+                if options["concurrency"] > 0:
+                    results[name]["rps"] = self.throughput(
+                        headers,
+                        path,
+                        options["iterations"],
+                        options["concurrency"],
+                    )
+
+        baseline = {}
+        if options["baseline"]:
+            with open(options["baseline"], encoding="utf-8") as file:
+                baseline = json.load(file)
+        regressions = self.report(results, baseline, options)
+
+        if options["save"]:
+            with open(options["save"], "w", encoding="utf-8") as file:
+                json.dump(results, file, indent=2, sort_keys=True)
+        if regressions:
+            raise CommandError(
+                f"Замедлились сценарии: {', '.join(regressions)}"
+            )
+
+    def get_user(self, email):
+        if email:
+            user = User.objects.filter(email=email).first()
+        else:
+            user = (
+                User.objects.annotate(carts=Count("shopping_cart"))
+                .filter(carts__gt=0, subscriber__isnull=False)
+                .order_by("id")
+                .first()
+            )
+        if user is None:
+            raise CommandError(
+                "Нет пользователя с подписками и списком покупок, "
+                "заполните базу командой seed"
+            )
+        return user
+
+    def get_scenarios(self, user):
+        token, _ = Token.objects.get_or_create(user=user)
+        anonymous = {}
+        client = {"authorization": f"Token {token.key}"}
+        ingredient = Ingredient.objects.order_by("id").first()
+        search = ingredient.name[:3] if ingredient else ""
+        return {
+            "recipes_anonymous": (anonymous, "/api/recipes/?limit=6"),
+            "recipes": (client, "/api/recipes/?limit=6"),
+            "recipes_cursor": (client, "/api/recipes/?limit=6&cursor="),
+            "subscriptions": (
+                client,
+                "/api/users/subscriptions/?limit=6&recipes_limit=3",
+            ),
+            "ingredients_search": (
+                anonymous,
+                f"/api/ingredients/?name={search}",
+            ),
+            "download_shopping_cart": (
+                client,
+                "/api/recipes/download_shopping_cart/",
+            ),
+        }
+
+    def request(self, client, path):
+        return self.check_response(path, client.get(path))
+
+    def check_response(self, path, response):
+        if response.status_code != 200:
+            raise CommandError(f"{path}: ответ {response.status_code}")
+        if response.streaming:
+            return len(b"".join(response.streaming_content))
+        return len(response.content)
+
+    def measure(self, client, path, iterations, warmup):
+        for _ in range(warmup):
+            self.request(client, path)
+
+        timings = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            self.request(client, path)
+            timings.append((time.perf_counter() - started) * 1000)
+
+        for namespace in CACHE_NAMESPACES.values():
+            namespace.clear()
+        recorder = RequestRecorder()
+        with connection.execute_wrapper(recorder):
+            self.request(client, path)
+
+        tracemalloc.start()
+        try:
+            size = self.request(client, path)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        return {
+            "p50_ms": round(percentile(timings, 50), 2),
+            "p95_ms": round(percentile(timings, 95), 2),
+            "queries": recorder.queries,
+            "peak_kib": round(peak / 1024, 1),
+            "bytes": size,
+        }
+
+    def throughput(self, headers, path, requests, concurrency):
+        if settings.SERVER_INTERFACE == "asgi":
+            run = asyncio.run(
+                self.run_async(headers, path, requests, concurrency)
+            )
+        else:
+            run = self.run_threaded(headers, path, requests, concurrency)
+        return round(requests / run, 1)
+
+    def run_threaded(self, headers, path, requests, concurrency):
+        def worker(count):
+            client = Client(**environ_headers(headers))
+            try:
+                for _ in range(count):
+                    self.request(client, path)
+            finally:
+                connections.close_all()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as executor:
+            list(executor.map(worker, split(requests, concurrency)))
+        return time.perf_counter() - started
+
+    async def run_async(self, headers, path, requests, concurrency):
+        client = AsyncClient()
+
+        async def worker(count):
+            for _ in range(count):
+                self.check_response(path, await client.get(path, **headers))
+
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(worker(count) for count in split(requests, concurrency))
+        )
+        return time.perf_counter() - started
+
+    def report(self, results, baseline, options):
+        self.stdout.write(
+            f"{'scenario':<24}{'p50 ms':>10}{'p95 ms':>10}"
+            f"{'queries':>9}{'peak KiB':>10}{'bytes':>10}"
+            + (f"{'rps':>10}" if options["concurrency"] > 0 else "")
+        )
+        regressions = []
+        for name, result in results.items():
+            line = (
+                f"{name:<24}{result['p50_ms']:>10}{result['p95_ms']:>10}"
+                f"{result['queries']:>9}{result['peak_kib']:>10}"
+                f"{result['bytes']:>10}"
+            )
+            if "rps" in result:
+                line += f"{result['rps']:>10}"
+            previous = baseline.get(name)
+            if previous:
+                change = (
+                    (result["p95_ms"] - previous["p95_ms"])
+                    / previous["p95_ms"]
+                    * 100
+                )
+                line += (
+                    f"  p95 {change:+.1f}%, "
+                    f"queries {result['queries'] - previous['queries']:+d}"
+                )
+                limit = options["max_regression"]
+                if limit is not None and (
+                    change > limit or result["queries"] > previous["queries"]
+                ):
+                    regressions.append(name)
+            self.stdout.write(line)
+        return regressions
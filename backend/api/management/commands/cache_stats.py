@@ -0,0 +1,51 @@
+from api.caching import CACHE_NAMESPACES, cache_stats
+from api.catalog import ingredient_catalog, tag_catalog  # noqa: F401
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = "Show cache hit rates per namespace"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reset", action="store_true", help="Reset the counters"
+        )
+        parser.add_argument(
+            "--clear",
+            nargs="+",
+            metavar="NAMESPACE",
+            help="Invalidate all keys of the given namespaces",
+        )
+
+    def handle(self, *args, **options):
+        if settings.CACHE_BACKEND == "locmem":
+            self.stderr.write(
+                "Кеш хранится в памяти процесса, "
+                "статистика воркеров приложения недоступна"
+            )
+
+        for name in options["clear"] or ():
+            if name not in CACHE_NAMESPACES:
+                raise CommandError(f"Неизвестное пространство имён: {name}")
+            CACHE_NAMESPACES[name].clear()
+            self.stdout.write(f"Сброшено пространство имён {name}")
+
+        counts = cache_stats.read(CACHE_NAMESPACES)
+        self.stdout.write(
+            f"{'namespace':<12}{'hits':>10}{'misses':>10}{'early':>8}"
+            f"{'stale':>8}{'coalesced':>11}{'hit rate':>10}"
+        )
+        for name, events in counts.items():
+            served = events["hits"] + events["stale"] + events["coalesced"]
+            total = served + events["misses"] + events["early"]
+            rate = f"{served / total:.1%}" if total else "-"
+            self.stdout.write(
+                f"{name:<12}{events['hits']:>10}{events['misses']:>10}"
+                f"{events['early']:>8}{events['stale']:>8}"
+                f"{events['coalesced']:>11}{rate:>10}"
+            )
+
+        if options["reset"]:
+            cache_stats.reset(CACHE_NAMESPACES)
+            self.stdout.write(self.style.SUCCESS("Счётчики обнулены"))
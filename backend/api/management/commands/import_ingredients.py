@@ -1,47 +1,216 @@
+import csv
+import io
 import json
 import os
 
-from django.core.management.base import BaseCommand
-from django.db import transaction
+from api.cache import invalidate_feed
+from api.catalog import ingredient_catalog
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
 from recipes.models import Ingredient
 
+READ_CHUNK_SIZE = 64 * 1024
+
+
+def read_json(file):
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    while True:
+        chunk = file.read(READ_CHUNK_SIZE)
+        buffer = buffer[position:] + chunk
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in "[, \t\r\n":
+                position += 1
+            if position >= len(buffer) or buffer[position] == "]":
+                break
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if not chunk:
+                    raise
+                break
+            yield item
+        if not chunk:
+            return
+
+
+def read_json_lines(file):
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+def read_csv(file):
+    yield from csv.DictReader(file)
+
+
+READERS = {
+    "json": read_json,
+    "jsonl": read_json_lines,
+    "csv": read_csv,
+}
+
 
 class Command(BaseCommand):
-    help = "Import ingredients data from JSON file"
+    help = "Import ingredients data from JSON, JSON Lines or CSV file"
 
-    def handle(self, *args, **options):
-        filename = "ingredients.json"
+    def add_arguments(self, parser):
         project_root = os.path.dirname(
             os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
         )
-        file_path = os.path.join(project_root, "data", filename)
-
-        with open(file_path, "r", encoding="UTF-8") as f:
-            data = json.load(f)
-            new_data = []
-
-            for item in data:
-                name = item["name"]
-                measurement_unit = item["measurement_unit"]
-
-                if not Ingredient.objects.filter(
-                    name=name, measurement_unit=measurement_unit
-                ).exists():
-                    new_data.append(
-                        Ingredient(
-                            name=name, measurement_unit=measurement_unit
+        parser.add_argument(
+            "path",
+            nargs="?",
+            default=os.path.join(project_root, "data", "ingredients.json"),
+        )
+        parser.add_argument("--format", choices=READERS)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--update",
+            action="store_true",
+            help="Update name and unit of rows that carry an existing id",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"] or os.path.splitext(path)[1][1:]
+        reader = READERS.get(file_format.lower())
+        if reader is None:
+            raise CommandError(f"Неизвестный формат файла: {path}")
+        batch_size = options["batch_size"]
+
+        new_data = []
+        conflicts = []
+        created = updated = 0
+
+        with open(path, "r", encoding="UTF-8", newline="") as f:
+            with transaction.atomic():
+                self.load_existing()
+                for item in reader(f):
+                    try:
+                        key = (
+                            item["name"].strip(),
+                            item["measurement_unit"].strip(),
                         )
-                    )
-
-            if new_data:
-                with transaction.atomic():
-                    Ingredient.objects.bulk_create(new_data)
-                self.stdout.write(
-                    self.style.SUCCESS(
-                        f"Добавлено ингредиентов: {len(new_data)}"
-                    )
+                        pk = (
+                            int(item["id"])
+                            if options["update"] and item.get("id")
+                            else None
+                        )
+                    except (KeyError, AttributeError, TypeError, ValueError):
+                        raise CommandError(f"Некорректная строка: {item}")
+
+                    if pk in self.keys:
+                        owner = self.existing.get(key)
+                        if owner == pk:
+                            continue
+                        if key in self.existing:
+                            conflicts.append((pk, key, owner))
+                            continue
+                        if key in self.freed:
+                            updated += self.update()
+                        self.rename(pk, key)
+                    elif key not in self.existing:
+                        if key in self.freed:
+                            updated += self.update()
+                        self.existing[key] = None
+                        new_data.append(key)
+
+                    if len(new_data) >= batch_size:
+                        created += self.insert(new_data)
+                        new_data = []
+                    if len(self.updates) >= batch_size:
+                        updated += self.update()
+
+                created += self.insert(new_data)
+                updated += self.update()
+
+        if created or updated:
+            transaction.on_commit(ingredient_catalog.bump_version)
+        if updated:
+            transaction.on_commit(invalidate_feed)
+
+        for pk, (name, measurement_unit), owner in conflicts:
+            owner = (
+                "новым ингредиентом из файла"
+                if owner is None
+                else f"ингредиентом с id {owner}"
+            )
+            self.stderr.write(
+                self.style.WARNING(
+                    f"Ингредиент с id {pk} не переименован: "
+                    f"{name} ({measurement_unit}) уже занято {owner}"
                 )
-            else:
-                self.stdout.write(
-                    self.style.SUCCESS("Нет ингредиентов для импорта")
+            )
+
+        if created or updated:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Добавлено ингредиентов: {created}, "
+                    f"обновлено: {updated}"
                 )
+            )
+        else:
+            self.stdout.write(
+                self.style.SUCCESS("Нет ингредиентов для импорта")
+            )
+
+    def load_existing(self):
+        self.existing = {}
+        self.keys = {}
+        for pk, name, measurement_unit in Ingredient.objects.values_list(
+            "id", "name", "measurement_unit"
+        ):
+            self.existing[name, measurement_unit] = pk
+            self.keys[pk] = (name, measurement_unit)
+        self.stored = dict(self.keys)
+        self.updates = {}
+        self.freed = set()
+
+    def rename(self, pk, key):
+        old_key = self.keys[pk]
+        del self.existing[old_key]
+        self.freed.add(old_key)
+        self.existing[key] = pk
+        self.keys[pk] = key
+        self.updates[pk] = key
+
+    def insert(self, rows):
+        if not rows:
+            return 0
+        if connection.vendor == "postgresql":
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(rows)
+            buffer.seek(0)
+            with connection.cursor() as cursor:
+                cursor.copy_expert(
+                    f"COPY {Ingredient._meta.db_table} "
+                    "(name, measurement_unit) FROM STDIN WITH (FORMAT csv)",
+                    buffer,
+                )
+        else:
+            Ingredient.objects.bulk_create(
+                [
+                    Ingredient(name=name, measurement_unit=measurement_unit)
+                    for name, measurement_unit in rows
+                ],
+                ignore_conflicts=True,
+            )
+        return len(rows)
+
+    def update(self):
+        ingredients = [
+            Ingredient(id=pk, name=name, measurement_unit=measurement_unit)
+            for pk, (name, measurement_unit) in self.updates.items()
+            if self.stored[pk] != (name, measurement_unit)
+        ]
+        if ingredients:
+            Ingredient.objects.bulk_update(
+                ingredients, ["name", "measurement_unit"]
+            )
+        self.stored.update(self.updates)
+        self.updates = {}
+        self.freed = set()
+        return len(ingredients)
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from recipes.shopping_lists import rebuild_shopping_lists
+
+
+class Command(BaseCommand):
+    help = "Rebuild aggregated shopping lists from users' shopping carts"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user", type=int, action="append", help="Only this user id"
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        items = rebuild_shopping_lists(
+            options["user"], batch_size=options["batch_size"]
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Записано позиций списков покупок: {items}")
+        )
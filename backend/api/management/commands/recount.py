@@ -0,0 +1,41 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from recipes.models import Favourite, Recipe
+from users.models import Subscribe
+
+User = get_user_model()
+
+
+def count_subquery(model, field):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef("pk")})
+            .order_by()
+            .values(field)
+            .annotate(count=Count("pk"))
+            .values("count")
+        ),
+        0,
+    )
+
+
+class Command(BaseCommand):
+    help = "Recount denormalized recipe, subscriber and favorite counters"
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            users = User.objects.update(
+                recipes_count=count_subquery(Recipe, "author"),
+                subscribers_count=count_subquery(Subscribe, "author"),
+            )
+            recipes = Recipe.objects.update(
+                favorites_count=count_subquery(Favourite, "recipe")
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Пересчитано пользователей: {users}, рецептов: {recipes}"
+            )
+        )
@@ -0,0 +1,204 @@
+import io
+import random
+
+from api.cache import invalidate_feed
+from api.catalog import tag_catalog
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from PIL import Image
+from recipes.models import (
+    Favourite,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    Tag,
+)
+from users.models import Subscribe
+
+User = get_user_model()
+
+SEED_TAGS = (
+    ("Завтрак", "#E26C2D", "breakfast"),
+    ("Обед", "#49B64E", "lunch"),
+    ("Ужин", "#8775D2", "dinner"),
+    ("Десерт", "#F2C94C", "dessert"),
+    ("Выпечка", "#2D9CDB", "bakery"),
+)
+SEED_IMAGE = "img/seed.png"
+
+
+class Command(BaseCommand):
+    help = "Fill the database with reproducible synthetic data"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--recipes", type=int, default=1000)
+        parser.add_argument("--ingredients-per-recipe", type=int, default=8)
+        parser.add_argument("--subscriptions", type=int, default=10)
+        parser.add_argument("--favorites", type=int, default=20)
+        parser.add_argument("--cart", type=int, default=10)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--prefix", default="seed")
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        prefix = options["prefix"]
+        if User.objects.filter(username__startswith=f"{prefix}_").exists():
+            raise CommandError(
+                f"Пользователи с префиксом {prefix} уже существуют"
+            )
+        if options["users"] < 1:
+            raise CommandError("Нужен хотя бы один пользователь")
+
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+
+        if not Ingredient.objects.exists():
+            call_command("import_ingredients", stdout=self.stdout)
+        ingredient_ids = list(
+            Ingredient.objects.order_by("id").values_list("id", flat=True)
+        )
+        image = self.get_image()
+
+        with transaction.atomic():
+            tag_ids = self.create_tags()
+            user_ids = self.create_users(prefix, options["users"])
+            recipe_ids = self.create_recipes(
+                user_ids, options["recipes"], image
+            )
+            self.create_recipe_links(
+                recipe_ids,
+                tag_ids,
+                ingredient_ids,
+                options["ingredients_per_recipe"],
+            )
+            self.create_subscriptions(user_ids, options["subscriptions"])
+            for model, count in (
+                (Favourite, options["favorites"]),
+                (ShoppingCart, options["cart"]),
+            ):
+                self.create_user_recipes(model, user_ids, recipe_ids, count)
+            transaction.on_commit(tag_catalog.bump_version)
+            transaction.on_commit(invalidate_feed)
+
+        call_command("recount", stdout=self.stdout)
+        call_command("rebuild_shopping_lists", stdout=self.stdout)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Создано пользователей: {len(user_ids)}, "
+                f"рецептов: {len(recipe_ids)}"
+            )
+        )
+
+    def sample(self, population, count):
+        return self.rng.sample(population, min(count, len(population)))
+
+    def get_image(self):
+        if not default_storage.exists(SEED_IMAGE):
+            buffer = io.BytesIO()
+            Image.new("RGB", (480, 480), "#E26C2D").save(buffer, "PNG")
+            return default_storage.save(
+                SEED_IMAGE, ContentFile(buffer.getvalue())
+            )
+        return SEED_IMAGE
+
+    def create_tags(self):
+        for name, color, slug in SEED_TAGS:
+            Tag.objects.get_or_create(
+                slug=slug, defaults={"name": name, "color": color}
+            )
+        return list(Tag.objects.order_by("id").values_list("id", flat=True))
+
+    def create_users(self, prefix, count):
+        password = make_password(prefix)
+        User.objects.bulk_create(
+            (
+                User(
+                    username=f"{prefix}_{number}",
+                    email=f"{prefix}_{number}@example.com",
+                    first_name=f"Имя {number}",
+                    last_name=f"Фамилия {number}",
+                    password=password,
+                )
+                for number in range(count)
+            ),
+            batch_size=self.batch_size,
+        )
+        return list(
+            User.objects.filter(username__startswith=f"{prefix}_")
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+
+    def create_recipes(self, user_ids, count, image):
+        first_id = (
+            Recipe.objects.order_by("-id").values_list("id", flat=True).first()
+        )
+        Recipe.objects.bulk_create(
+            (
+                Recipe(
+                    name=f"Рецепт {number}",
+                    author_id=self.rng.choice(user_ids),
+                    text=f"Описание рецепта {number}",
+                    cooking_time=self.rng.randint(1, 180),
+                    image=image,
+                )
+                for number in range(count)
+            ),
+            batch_size=self.batch_size,
+        )
+        return list(
+            Recipe.objects.filter(id__gt=first_id or 0, author_id__in=user_ids)
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+
+    def create_recipe_links(self, recipe_ids, tag_ids, ingredient_ids, count):
+        RecipeTag = Recipe.tags.through
+        RecipeTag.objects.bulk_create(
+            (
+                RecipeTag(recipe_id=recipe_id, tag_id=tag_id)
+                for recipe_id in recipe_ids
+                for tag_id in self.sample(tag_ids, self.rng.randint(1, 3))
+            ),
+            batch_size=self.batch_size,
+        )
+        RecipeIngredient.objects.bulk_create(
+            (
+                RecipeIngredient(
+                    recipe_id=recipe_id,
+                    ingredient_id=ingredient_id,
+                    amount=self.rng.randint(1, 500),
+                )
+                for recipe_id in recipe_ids
+                for ingredient_id in self.sample(ingredient_ids, count)
+            ),
+            batch_size=self.batch_size,
+        )
+
+    def create_subscriptions(self, user_ids, count):
+        Subscribe.objects.bulk_create(
+            (
+                Subscribe(user_id=user_id, author_id=author_id)
+                for user_id in user_ids
+                for author_id in self.sample(user_ids, count)
+                if author_id != user_id
+            ),
+            batch_size=self.batch_size,
+        )
+
+    def create_user_recipes(self, model, user_ids, recipe_ids, count):
+        model.objects.bulk_create(
+            (
+                model(user_id=user_id, recipe_id=recipe_id)
+                for user_id in user_ids
+                for recipe_id in self.sample(recipe_ids, count)
+            ),
+            batch_size=self.batch_size,
+        )
@@ -0,0 +1,201 @@
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .caching import incr_counter
+
+METRICS = (
+    ("requests", "counter", "Обработано запросов"),
+    ("queries", "counter", "Выполнено SQL-запросов"),
+    ("sql_seconds", "counter", "Время SQL-запросов, с"),
+    ("serializer_seconds", "counter", "Время сериализации, с"),
+    ("app_seconds", "counter", "Время вне SQL-запросов и сериализации, с"),
+    ("duration_seconds", "counter", "Полное время ответа, с"),
+    ("response_bytes", "counter", "Размер ответов, байт"),
+    ("query_budget_exceeded", "counter", "Превышений бюджета запросов"),
+)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def to_microseconds(seconds):
+    return round(seconds * 1_000_000)
+
+
+class RequestRecorder:
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.serializer_time = 0.0
+        self.serializing = False
+        self.started = time.perf_counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - started
+            self.queries += 1
+
+    @contextmanager
+    def measure_serialization(self):
+        if self.serializing:
+            yield
+            return
+        self.serializing = True
+        started = time.perf_counter()
+        sql_time = self.sql_time
+        try:
+            yield
+        finally:
+            self.serializer_time += (
+                time.perf_counter() - started - (self.sql_time - sql_time)
+            )
+            self.serializing = False
+
+    @property
+    def duration(self):
+        return time.perf_counter() - self.started
+
+    def get_app_time(self, duration):
+        return max(duration - self.sql_time - self.serializer_time, 0)
+
+    def server_timing(self, duration):
+        return ", ".join(
+            (
+                f'db;dur={self.sql_time * 1000:.1f};desc="{self.queries} SQL"',
+                f"ser;dur={self.serializer_time * 1000:.1f}",
+                f"app;dur={self.get_app_time(duration) * 1000:.1f}",
+                f"total;dur={duration * 1000:.1f}",
+            )
+        )
+
+
+class MetricsRegistry:
+    labels_key = "metrics:labels"
+
+    def __init__(self, prefix="foodgram"):
+        self.prefix = prefix
+        self._values = defaultdict(lambda: defaultdict(int))
+        self._lock = threading.Lock()
+        self._flushed_at = time.monotonic()
+
+    def get_key(self, view, method, name):
+        return f"metrics:{view}:{method}:{name}"
+
+    def observe(self, view, method, recorder, duration, size, exceeded):
+        with self._lock:
+            values = self._values[view, method]
+            values["requests"] += 1
+            values["queries"] += recorder.queries
+            values["sql_seconds"] += to_microseconds(recorder.sql_time)
+            values["serializer_seconds"] += to_microseconds(
+                recorder.serializer_time
+            )
+            values["app_seconds"] += to_microseconds(
+                recorder.get_app_time(duration)
+            )
+            values["duration_seconds"] += to_microseconds(duration)
+            values["response_bytes"] += size
+            values["query_budget_exceeded"] += exceeded
+            due = (
+                time.monotonic() - self._flushed_at
+                >= settings.METRICS_FLUSH_INTERVAL
+            )
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            values, self._values = self._values, defaultdict(
+                lambda: defaultdict(int)
+            )
+            self._flushed_at = time.monotonic()
+        if not values:
+            return
+        labels = set(cache.get(self.labels_key, ()))
+        if not labels.issuperset(values):
+            cache.set(
+                self.labels_key, sorted(labels.union(values)), timeout=None
+            )
+        for (view, method), metrics in values.items():
+            for name, value in metrics.items():
+                if value:
+                    incr_counter(self.get_key(view, method, name), value)
+
+    def read(self):
+        self.flush()
+        keys = {
+            self.get_key(view, method, name): (view, method, name)
+            for view, method in cache.get(self.labels_key, ())
+            for name, _, _ in METRICS
+        }
+        values = defaultdict(dict)
+        for key, value in cache.get_many(keys).items():
+            view, method, name = keys[key]
+            values[view, method][name] = value
+        return values
+
+    def render(self):
+        values = self.read()
+        lines = []
+        for name, kind, description in METRICS:
+            metric = f"{self.prefix}_{name}_total"
+            lines.append(f"# HELP {metric} {description}")
+            lines.append(f"# TYPE {metric} {kind}")
+            for (view, method), metrics in sorted(values.items()):
+                value = metrics.get(name, 0)
+                if name.endswith("_seconds"):
+                    value /= 1_000_000
+                lines.append(
+                    f'{metric}{{view="{view}",method="{method}"}} {value}'
+                )
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+current_recorder = ContextVar("current_recorder", default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    recorder = current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def install_query_recorder(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@contextmanager
+def record_queries():
+    recorder = RequestRecorder()
+    token = current_recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        current_recorder.reset(token)
+
+
+def record_serialization(func):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        recorder = current_recorder.get()
+        if recorder is None:
+            return func(*args, **kwargs)
+        with recorder.measure_serialization():
+            return func(*args, **kwargs)
+
+    return wrapper
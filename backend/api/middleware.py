@@ -0,0 +1,85 @@
+import logging
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from rest_framework.permissions import SAFE_METHODS
+
+from .db import replica_reads
+from .metrics import QueryBudgetExceeded, record_queries, registry
+
+logger = logging.getLogger(__name__)
+
+
+class HybridMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+
+class QueryMetricsMiddleware(HybridMiddleware):
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        with record_queries() as recorder:
+            response = self.get_response(request)
+        return self.process_response(request, response, recorder)
+
+    async def __acall__(self, request):
+        with record_queries() as recorder:
+            response = await self.get_response(request)
+        return self.process_response(request, response, recorder)
+
+    def process_response(self, request, response, recorder):
+        duration = recorder.duration
+        view = self.get_view_name(request)
+        exceeded = self.check_budget(f"{request.method} {view}", recorder)
+        size = 0 if response.streaming else len(response.content)
+        registry.observe(
+            view, request.method, recorder, duration, size, exceeded
+        )
+        if settings.SERVER_TIMING:
+            response["Server-Timing"] = recorder.server_timing(duration)
+        return response
+
+    def get_view_name(self, request):
+        match = request.resolver_match
+        if match is None:
+            return "unresolved"
+        return match.view_name
+
+    def check_budget(self, endpoint, recorder):
+        budget = settings.QUERY_BUDGETS.get(
+            endpoint, settings.QUERY_BUDGET_DEFAULT
+        )
+        if budget is None or recorder.queries <= budget:
+            return False
+        message = (
+            f"{endpoint}: {recorder.queries} SQL-запросов при бюджете {budget}"
+        )
+        if settings.QUERY_BUDGET_STRICT:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+        return True
+
+
+class ReplicaRoutingMiddleware(HybridMiddleware):
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        token = replica_reads.set(request.method in SAFE_METHODS)
+        try:
+            return self.get_response(request)
+        finally:
+            replica_reads.reset(token)
+
+    async def __acall__(self, request):
+        token = replica_reads.set(request.method in SAFE_METHODS)
+        try:
+            return await self.get_response(request)
+        finally:
+            replica_reads.reset(token)
@@ -1,5 +1,83 @@
+from collections import OrderedDict
+
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 
 class CustomPagination(PageNumberPagination):
     page_size_query_param = "limit"
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+    invalid_cursor_message = "Недопустимый курсор"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.use_cursor = self.cursor_query_param in request.query_params
+        if not self.use_cursor:
+            return super().paginate_queryset(queryset, request, view)
+
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        self.request = request
+        queryset = queryset.order_by("-id")
+
+        self.count = None
+        if request.query_params.get(self.count_query_param) != "false":
+            self.count = queryset.count()
+
+        cursor = self.get_cursor(request)
+        if cursor is not None:
+            queryset = queryset.filter(id__lt=cursor)
+
+        results = list(queryset[: page_size + 1])
+        self.next_cursor = None
+        if len(results) > page_size:
+            results = results[:page_size]
+            self.next_cursor = results[-1].id
+        return results
+
+    def get_count(self):
+        if self.use_cursor:
+            return self.count
+        return self.page.paginator.count
+
+    def get_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+        try:
+            return int(cursor)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.use_cursor:
+            return super().get_next_link()
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url, self.cursor_query_param, self.next_cursor
+        )
+
+    def get_previous_link(self):
+        if not self.use_cursor:
+            return super().get_previous_link()
+        return None
+
+    def get_paginated_response(self, data):
+        if not self.use_cursor:
+            return super().get_paginated_response(data)
+        return Response(
+            OrderedDict(
+                [
+                    ("count", self.count),
+                    ("next", self.get_next_link()),
+                    ("previous", None),
+                    ("results", data),
+                ]
+            )
+        )
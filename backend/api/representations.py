@@ -0,0 +1,106 @@
+from collections import defaultdict
+from operator import attrgetter
+
+from recipes.models import Recipe, RecipeIngredient
+
+from .metrics import record_serialization
+
+
+class Representation:
+    def __init__(self, *fields):
+        self.fields = fields
+        self.getter = attrgetter(*fields)
+
+    def from_object(self, obj):
+        return dict(zip(self.fields, self.getter(obj)))
+
+    def from_row(self, row):
+        return dict(zip(self.fields, row))
+
+
+tag_representation = Representation("id", "name", "color", "slug")
+ingredient_representation = Representation("id", "name", "measurement_unit")
+recipe_ingredient_representation = Representation(
+    "id", "name", "measurement_unit", "amount"
+)
+user_representation = Representation(
+    "email", "id", "username", "first_name", "last_name"
+)
+
+
+def represent_file(file, request=None):
+    if not file:
+        return None
+    if request is not None:
+        return request.build_absolute_uri(file.url)
+    return file.url
+
+
+def group_rows(rows, representation):
+    groups = defaultdict(list)
+    for recipe_id, *row in rows:
+        groups[recipe_id].append(representation.from_row(row))
+    return groups
+
+
+def represent_author(recipe):
+    if recipe.author is None:
+        return None
+    data = user_representation.from_object(recipe.author)
+    data["is_subscribed"] = bool(recipe.author_is_subscribed)
+    return data
+
+
+@record_serialization
+def represent_recipes(recipes, request, thumbnails=False):
+    recipe_ids = [recipe.id for recipe in recipes]
+    tags = group_rows(
+        Recipe.tags.through.objects.filter(recipe_id__in=recipe_ids)
+        .order_by("tag_id")
+        .values_list(
+            "recipe_id", "tag_id", "tag__name", "tag__color", "tag__slug"
+        ),
+        tag_representation,
+    )
+    ingredients = group_rows(
+        RecipeIngredient.objects.filter(recipe_id__in=recipe_ids)
+        .order_by("id")
+        .values_list(
+            "recipe_id",
+            "ingredient_id",
+            "ingredient__name",
+            "ingredient__measurement_unit",
+            "amount",
+        ),
+        recipe_ingredient_representation,
+    )
+    return [
+        {
+            "id": recipe.id,
+            "tags": tags.get(recipe.id, []),
+            "author": represent_author(recipe),
+            "ingredients": ingredients.get(recipe.id, []),
+            "is_favorited": bool(recipe.is_favorited),
+            "is_in_shopping_cart": bool(recipe.is_in_shopping_cart),
+            "name": recipe.name,
+            "image": represent_file(
+                thumbnails and recipe.thumbnail or recipe.image, request
+            ),
+            "text": recipe.text,
+            "cooking_time": recipe.cooking_time,
+        }
+        for recipe in recipes
+    ]
+
+
+@record_serialization
+def represent_short_recipes(recipes, request=None):
+    return [
+        {
+            "id": recipe.id,
+            "name": recipe.name,
+            "image": represent_file(recipe.thumbnail or recipe.image, request),
+            "cooking_time": recipe.cooking_time,
+        }
+        for recipe in recipes
+    ]
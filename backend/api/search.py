@@ -0,0 +1,82 @@
+from bisect import bisect_left
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Case, CharField, IntegerField, Value, When
+from django.db.models.lookups import IContains
+
+from .catalog import ingredient_catalog
+
+
+@CharField.register_lookup
+class TrigramContains(IContains):
+    lookup_name = "trigram_contains"
+
+    def as_postgresql(self, compiler, connection):
+        lhs, lhs_params = compiler.compile(self.lhs)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} ILIKE {rhs}", lhs_params + rhs_params
+
+
+class IngredientIndex:
+    def __init__(self):
+        self._index = (None, [])
+
+    def get_entries(self):
+        state = ingredient_catalog.get_state()
+        etag, entries = self._index
+        if etag != state.etag:
+            entries = sorted(
+                (ingredient.name.lower(), ingredient.id)
+                for ingredient in state.objects
+            )
+            self._index = (state.etag, entries)
+        return entries
+
+    def search(self, value, limit):
+        value = value.lower()
+        entries = self.get_entries()
+
+        ids = []
+        index = bisect_left(entries, (value,))
+        while (
+            index < len(entries)
+            and len(ids) < limit
+            and entries[index][0].startswith(value)
+        ):
+            ids.append(entries[index][1])
+            index += 1
+
+        for name, pk in entries:
+            if len(ids) >= limit:
+                break
+            if value in name and not name.startswith(value):
+                ids.append(pk)
+        return ids
+
+
+ingredient_index = IngredientIndex()
+
+
+def search_ingredients(queryset, value):
+    limit = settings.INGREDIENT_SEARCH_LIMIT
+    if connections[queryset.db].vendor == "postgresql":
+        return (
+            queryset.filter(name__trigram_contains=value)
+            .annotate(
+                rank=Case(
+                    When(name__istartswith=value, then=Value(0)),
+                    default=Value(1),
+                    output_field=IntegerField(),
+                )
+            )
+            .order_by("rank", "name")[:limit]
+        )
+
+    ids = ingredient_index.search(value, limit)
+    return queryset.filter(id__in=ids).order_by(
+        Case(
+            *[When(id=pk, then=Value(rank)) for rank, pk in enumerate(ids)],
+            output_field=IntegerField(),
+        )
+    )
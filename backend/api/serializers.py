@@ -1,8 +1,12 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.files import File
 from django.db import transaction
+from django.db.models import prefetch_related_objects
 from djoser.serializers import UserSerializer as DjoserUserSerialiser
-from drf_extra_fields.fields import Base64ImageField
+from jobs.queue import enqueue
 from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+from recipes.signals import recipe_ingredients_changed
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 from rest_framework.fields import BooleanField, SerializerMethodField
@@ -10,6 +14,10 @@ from rest_framework.relations import PrimaryKeyRelatedField
 from rest_framework.serializers import ModelSerializer
 from users.models import Subscribe
 
+from .catalog import ingredient_catalog, tag_catalog
+from .fields import RecipeImageField
+from .representations import represent_short_recipes
+
 User = get_user_model()
 
 
@@ -28,6 +36,8 @@ class UserSerializer(DjoserUserSerialiser):
         )
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, "is_subscribed"):
+            return obj.is_subscribed
         user = self.context.get("request").user
         return (
             not user.is_anonymous
@@ -37,7 +47,6 @@ class UserSerializer(DjoserUserSerialiser):
 
 class SubscribeSerializer(ModelSerializer):
     recipes = SerializerMethodField()
-    recipes_count = SerializerMethodField()
 
     class Meta:
         model = User
@@ -61,17 +70,8 @@ class SubscribeSerializer(ModelSerializer):
             raise ValidationError("Нельзя подписаться на себя!")
         return data
 
-    def get_recipes_count(self, obj):
-        return obj.recipes.count()
-
     def get_recipes(self, obj):
-        request = self.context.get("request")
-        limit = request.GET.get("recipes_limit")
-        recipes = obj.recipes.all()
-        if limit:
-            recipes = recipes[: int(limit)]
-        serializer = RecipeShortSerializer(recipes, many=True, read_only=True)
-        return serializer.data
+        return represent_short_recipes(obj.recipes.all())
 
 
 class IngredientSerializer(ModelSerializer):
@@ -106,7 +106,7 @@ class TagSerializer(ModelSerializer):
 class RecipeGetSerializer(ModelSerializer):
     tags = TagSerializer(many=True, read_only=True)
     author = UserSerializer(read_only=True)
-    image = Base64ImageField()
+    image = RecipeImageField()
     is_favorited = BooleanField(read_only=True, default=False)
     is_in_shopping_cart = BooleanField(read_only=True, default=False)
     ingredients = RecipeIngredientGetSerializer(
@@ -129,11 +129,35 @@ class RecipeGetSerializer(ModelSerializer):
         )
 
 
+class CatalogPrimaryKeyRelatedField(PrimaryKeyRelatedField):
+    catalog = None
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        obj = self.catalog.get(pk)
+        if obj is None:
+            obj = self.catalog.get_state(
+                max_age=settings.CATALOG_RELOAD_INTERVAL
+            ).by_id.get(pk)
+        if obj is None:
+            self.fail("does_not_exist", pk_value=data)
+        return obj
+
+
+class TagPrimaryKeyRelatedField(CatalogPrimaryKeyRelatedField):
+    catalog = tag_catalog
+
+
 class RecipeCreateUpdateSerializer(ModelSerializer):
-    tags = PrimaryKeyRelatedField(queryset=Tag.objects.all(), many=True)
+    tags = TagPrimaryKeyRelatedField(queryset=Tag.objects.all(), many=True)
     author = UserSerializer(read_only=True)
     ingredients = RecipeIngredientGetSerializer(many=True)
-    image = Base64ImageField()
+    image = RecipeImageField()
 
     class Meta:
         model = Recipe
@@ -161,16 +185,18 @@ class RecipeCreateUpdateSerializer(ModelSerializer):
                 {"ingredients": ["Нужен хотя бы один ингредиент"]}
             )
 
-        ingredient_ids = [item["ingredient"]["id"] for item in value]
-        ingredients = Ingredient.objects.filter(id__in=ingredient_ids)
-
-        ingredients_dict = {
-            ingredient.id: ingredient for ingredient in ingredients
-        }
+        ingredients_dict = ingredient_catalog.get_state().by_id
+        if any(
+            item["ingredient"]["id"] not in ingredients_dict for item in value
+        ):
+            ingredients_dict = ingredient_catalog.get_state(
+                max_age=settings.CATALOG_RELOAD_INTERVAL
+            ).by_id
 
         errors = []
 
         ingredients_list = []
+        seen_ids = set()
 
         for item in value:
             ingredient_id = item["ingredient"]["id"]
@@ -178,18 +204,21 @@ class RecipeCreateUpdateSerializer(ModelSerializer):
 
             if not ingredient:
                 errors.append({"ingredient": ["Недопустимый ингредиент"]})
-            elif ingredient in ingredients_list:
+            elif ingredient_id in seen_ids:
                 errors.append({"ingredient": ["Не должны повторятся"]})
 
             if int(item["amount"]) <= 0:
                 errors.append({"ingredient": ["Минимальное количество 1"]})
 
-            ingredients_list.append(ingredient)
+            seen_ids.add(ingredient_id)
+            ingredients_list.append(
+                {"ingredient": ingredient, "amount": item["amount"]}
+            )
 
         if errors:
             raise ValidationError(errors)
 
-        return value
+        return ingredients_list
 
     def validate_tags(self, value):
         if not value:
@@ -210,36 +239,86 @@ class RecipeCreateUpdateSerializer(ModelSerializer):
         return value
 
     @transaction.atomic
-    def create_ingredients_amounts(self, ingredients, recipe):
-        ingredient_ids = [
-            ingredient["ingredient"]["id"] for ingredient in ingredients
-        ]
-        existing_ingredients = Ingredient.objects.filter(id__in=ingredient_ids)
-
-        ingredient_objs = [
-            RecipeIngredient(
-                ingredient=ingredient,
-                recipe=recipe,
-                amount=next(
-                    item["amount"]
-                    for item in ingredients
-                    if item["ingredient"]["id"] == ingredient.id
-                ),
+    def save_ingredients_amounts(self, recipe, ingredients, existing=()):
+        current = {}
+        to_delete = []
+        for recipe_ingredient in existing:
+            duplicate = current.pop(recipe_ingredient.ingredient_id, None)
+            if duplicate is not None:
+                to_delete.append(duplicate)
+            current[recipe_ingredient.ingredient_id] = recipe_ingredient
+
+        to_create = []
+        to_update = []
+        amounts = {}
+        for item in ingredients:
+            recipe_ingredient = current.pop(item["ingredient"].id, None)
+            if recipe_ingredient is None:
+                to_create.append(
+                    RecipeIngredient(
+                        recipe=recipe,
+                        ingredient=item["ingredient"],
+                        amount=item["amount"],
+                    )
+                )
+                amounts[item["ingredient"].id] = item["amount"]
+            elif recipe_ingredient.amount != item["amount"]:
+                amounts[item["ingredient"].id] = (
+                    item["amount"] - recipe_ingredient.amount
+                )
+                recipe_ingredient.amount = item["amount"]
+                to_update.append(recipe_ingredient)
+        to_delete.extend(current.values())
+        for recipe_ingredient in to_delete:
+            amounts[recipe_ingredient.ingredient_id] = (
+                amounts.get(recipe_ingredient.ingredient_id, 0)
+                - recipe_ingredient.amount
+            )
+
+        if to_delete:
+            # RecipeIngredient has no delete receivers, so this is a single
+            # DELETE; shopping lists follow recipe_ingredients_changed below.
+            RecipeIngredient.objects.filter(
+                id__in=[obj.id for obj in to_delete]
+            ).delete()
+        if to_update:
+            RecipeIngredient.objects.bulk_update(to_update, ["amount"])
+        if to_create:
+            RecipeIngredient.objects.bulk_create(to_create)
+        if amounts:
+            recipe_ingredients_changed.send(
+                sender=Recipe, recipe=recipe, amounts=amounts
             )
-            for ingredient in existing_ingredients
-        ]
 
-        RecipeIngredient.objects.bulk_create(ingredient_objs)
+    def pop_image(self, validated_data):
+        image = validated_data.pop("image", None)
+        if image is not None:
+            validated_data["image"] = File(
+                image.file, name=f"{image.digest[:32]}.{image.extension}"
+            )
+            validated_data["thumbnail"] = ""
+        return image
+
+    def render_images(self, recipe, image):
+        image.file.close()
+        enqueue(
+            "recipes.render_images",
+            recipe_id=recipe.id,
+            image=recipe.image.name,
+            digest=image.digest,
+        )
 
     @transaction.atomic
     def create(self, validated_data):
         tags = validated_data.pop("tags")
         ingredients = validated_data.pop("ingredients")
+        image = self.pop_image(validated_data)
 
         recipe = Recipe.objects.create(**validated_data)
         recipe.tags.set(tags)
 
-        self.create_ingredients_amounts(ingredients=ingredients, recipe=recipe)
+        self.save_ingredients_amounts(recipe=recipe, ingredients=ingredients)
+        self.render_images(recipe, image)
 
         return recipe
 
@@ -247,27 +326,42 @@ class RecipeCreateUpdateSerializer(ModelSerializer):
     def update(self, instance, validated_data):
         tags = validated_data.pop("tags")
         ingredients = validated_data.pop("ingredients")
+        image = self.pop_image(validated_data)
 
-        instance = super().update(instance, validated_data)
+        for field, value in validated_data.items():
+            setattr(instance, field, value)
+        instance.save(update_fields=validated_data)
 
         instance.tags.set(tags)
 
-        instance.ingredients.clear()
-        self.create_ingredients_amounts(
-            recipe=instance, ingredients=ingredients
+        self.save_ingredients_amounts(
+            recipe=instance,
+            ingredients=ingredients,
+            existing=instance.recipe_ingredients.all(),
         )
+        if image is not None:
+            self.render_images(instance, image)
 
         return instance
 
     def to_representation(self, instance):
+        prefetch_related_objects(
+            [instance], "tags", "recipe_ingredients__ingredient"
+        )
         request = self.context.get("request")
         context = {"request": request}
         return RecipeGetSerializer(instance, context=context).data
 
 
 class RecipeShortSerializer(ModelSerializer):
-    image = Base64ImageField()
+    image = RecipeImageField(thumbnail=True)
 
     class Meta:
         model = Recipe
         fields = ("id", "name", "image", "cooking_time")
+
+
+class RecipeIdsSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False
+    )
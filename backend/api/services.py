@@ -1,31 +1,170 @@
+import csv
 import io
+from itertools import chain
 
-from django.db.models import Sum
-from recipes.models import RecipeIngredient
-from rest_framework.response import Response
-from rest_framework.status import HTTP_404_NOT_FOUND
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from recipes.models import Recipe, ShoppingListItem
+from recipes.signals import user_recipes_added, user_recipes_removed
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+from rest_framework.exceptions import NotFound
 
+SHOPPING_LIST_TITLE = "Список ингредиентов:"
 
-def get_shopping_list(user):
-    if not user.shopping_cart.exists():
-        return Response(status=HTTP_404_NOT_FOUND)
+User = get_user_model()
 
-    ingredients = (
-        RecipeIngredient.objects.filter(recipe__shopping_cart__user=user)
-        .values("ingredient__name", "ingredient__measurement_unit")
-        .annotate(amount=Sum("amount"))
+
+def lock_user(user):
+    list(User.objects.select_for_update().filter(pk=user.pk).values("pk"))
+
+
+@transaction.atomic
+def add_user_recipes(model, user, recipe_ids):
+    recipe_ids = list(dict.fromkeys(recipe_ids))
+    recipes = Recipe.objects.in_bulk(recipe_ids)
+    missing = [pk for pk in recipe_ids if pk not in recipes]
+    if missing:
+        raise NotFound({"errors": f"Рецепты не найдены: {missing}"})
+
+    lock_user(user)
+    existing = set(
+        model.objects.filter(user=user, recipe_id__in=recipe_ids).values_list(
+            "recipe_id", flat=True
+        )
+    )
+    added = [recipes[pk] for pk in recipe_ids if pk not in existing]
+    model.objects.bulk_create(
+        [model(user=user, recipe=recipe) for recipe in added]
     )
+    if added:
+        user_recipes_added.send(sender=model, user=user, recipes=added)
+    return added
 
-    ingredients_list = "Список ингредиентов:\n"
-    ingredients_list += "\n".join(
-        [
-            f'- {ingredient["ingredient__name"]} '
-            f'({ingredient["ingredient__measurement_unit"]})'
-            f' - {ingredient["amount"]}'
-            for ingredient in ingredients
-        ]
+
+@transaction.atomic
+def remove_user_recipes(model, user, recipe_ids):
+    lock_user(user)
+    removed = list(
+        model.objects.filter(user=user, recipe_id__in=recipe_ids).values_list(
+            "recipe_id", flat=True
+        )
     )
+    if not removed:
+        return 0
+    # Favourite and ShoppingCart have no reverse relations or delete
+    # receivers, so this is a single DELETE; counters and shopping lists
+    # are updated once by the user_recipes_removed receivers.
+    model.objects.filter(user=user, recipe_id__in=removed).delete()
+    user_recipes_removed.send(sender=model, user=user, recipe_ids=removed)
+    return len(removed)
+
+
+def get_shopping_list(user):
+    ingredients = (
+        ShoppingListItem.objects.filter(user=user)
+        .values(
+            "ingredient__name",
+            "ingredient__measurement_unit",
+            amount=F("total_amount"),
+        )
+        .order_by("ingredient__name", "ingredient__measurement_unit")
+        .iterator()
+    )
+    first = next(ingredients, None)
+    if first is None:
+        raise NotFound("Список покупок пуст")
+    return chain([first], ingredients)
+
 
-    buffer = io.BytesIO(ingredients_list.encode("utf-8"))
+class Echo:
+    def write(self, value):
+        return value
 
-    return buffer
+
+class TextShoppingListExporter:
+    content_type = "text/plain; charset=utf-8"
+    extension = "txt"
+
+    def render(self, ingredients):
+        yield SHOPPING_LIST_TITLE.encode("utf-8")
+        for ingredient in ingredients:
+            yield (
+                f'\n- {ingredient["ingredient__name"]} '
+                f'({ingredient["ingredient__measurement_unit"]})'
+                f' - {ingredient["amount"]}'
+            ).encode("utf-8")
+
+
+class CsvShoppingListExporter:
+    content_type = "text/csv; charset=utf-8"
+    extension = "csv"
+
+    def render(self, ingredients):
+        writer = csv.writer(Echo())
+        yield writer.writerow(
+            ["Ингредиент", "Единица измерения", "Количество"]
+        ).encode("utf-8")
+        for ingredient in ingredients:
+            yield writer.writerow(
+                [
+                    ingredient["ingredient__name"],
+                    ingredient["ingredient__measurement_unit"],
+                    ingredient["amount"],
+                ]
+            ).encode("utf-8")
+
+
+class PdfShoppingListExporter:
+    content_type = "application/pdf"
+    extension = "pdf"
+    font_name = "ShoppingListFont"
+    font_size = 12
+    margin = 50
+    line_height = 18
+
+    def __init__(self):
+        if self.font_name not in pdfmetrics.getRegisteredFontNames():
+            pdfmetrics.registerFont(
+                TTFont(self.font_name, settings.SHOPPING_LIST_PDF_FONT)
+            )
+
+    def render(self, ingredients):
+        buffer = io.BytesIO()
+        pdf = canvas.Canvas(buffer, pagesize=A4)
+        width, height = A4
+        y = height - self.margin
+        pdf.setFont(self.font_name, self.font_size)
+        pdf.drawString(self.margin, y, SHOPPING_LIST_TITLE)
+
+        for ingredient in ingredients:
+            y -= self.line_height
+            if y < self.margin:
+                pdf.showPage()
+                pdf.setFont(self.font_name, self.font_size)
+                y = height - self.margin
+            pdf.drawString(
+                self.margin,
+                y,
+                f'- {ingredient["ingredient__name"]} '
+                f'({ingredient["ingredient__measurement_unit"]})'
+                f' - {ingredient["amount"]}',
+            )
+
+        pdf.save()
+        buffer.seek(0)
+        return iter(lambda: buffer.read(64 * 1024), b"")
+
+
+SHOPPING_LIST_EXPORTERS = {
+    exporter.extension: exporter
+    for exporter in (
+        TextShoppingListExporter,
+        CsvShoppingListExporter,
+        PdfShoppingListExporter,
+    )
+}
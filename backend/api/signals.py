@@ -0,0 +1,64 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+from recipes.models import Ingredient, Recipe, RecipeIngredient, Tag
+from recipes.signals import recipe_ingredients_changed
+
+from .cache import invalidate_feed
+from .catalog import ingredient_catalog, tag_catalog
+
+User = get_user_model()
+
+AUTHOR_FIELDS = {"email", "username", "first_name", "last_name"}
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(recipe_ingredients_changed, sender=Recipe)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_anonymous_feed(sender, **kwargs):
+    transaction.on_commit(invalidate_feed)
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def bump_ingredient_catalog(sender, **kwargs):
+    transaction.on_commit(ingredient_catalog.bump_version)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def bump_tag_catalog(sender, **kwargs):
+    transaction.on_commit(tag_catalog.bump_version)
+
+
+def bump_recipes(recipes):
+    recipes.update(version=F("version") + 1, updated_at=timezone.now())
+    transaction.on_commit(invalidate_feed)
+
+
+@receiver(post_save, sender=User)
+def bump_author_recipes(sender, instance, created, update_fields, **kwargs):
+    if created or (
+        update_fields is not None and not AUTHOR_FIELDS & set(update_fields)
+    ):
+        return
+    bump_recipes(Recipe.objects.filter(author=instance))
+
+
+@receiver(pre_delete, sender=User)
+def bump_deleted_author_recipes(sender, instance, **kwargs):
+    bump_recipes(Recipe.objects.filter(author=instance))
@@ -0,0 +1,1071 @@
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest import mock
+from uuid import UUID
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.admin import site
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.db.models import Sum
+from django.http import HttpResponse
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from recipes.models import (
+    Favourite,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    ShoppingCart,
+    ShoppingListItem,
+    Tag,
+)
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from users.models import Subscribe
+
+from .async_views import FAST_PATHS, async_read_view
+from .caching import CacheNamespace
+from .catalog import ingredient_catalog, tag_catalog
+from .db import PrimaryReplicaRouter, primary_reads, replica_reads
+from .metrics import MetricsRegistry, RequestRecorder
+from .parsers import ORJSONParser
+from .renderers import ORJSONRenderer
+from .representations import represent_recipes, represent_short_recipes
+from .serializers import (
+    RecipeCreateUpdateSerializer,
+    RecipeGetSerializer,
+    RecipeShortSerializer,
+)
+from .services import add_user_recipes
+from .views import RecipeViewSet
+
+User = get_user_model()
+
+
+class RecipeDataMixin:
+    recipes_count = 60
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="reader",
+            email="reader@example.com",
+            password="password",
+            first_name="Читатель",
+            last_name="Тестовый",
+        )
+        cls.authors = [
+            User.objects.create_user(
+                username=f"author_{number}",
+                email=f"author_{number}@example.com",
+                password="password",
+                first_name=f"Автор {number}",
+                last_name="Тестовый",
+            )
+            for number in range(3)
+        ]
+        cls.tags = [
+            Tag.objects.create(
+                name=f"Тег {number}",
+                color=f"#00000{number}",
+                slug=f"tag_{number}",
+            )
+            for number in range(3)
+        ]
+        cls.ingredients = [
+            Ingredient.objects.create(
+                name=f"Ингредиент {number}", measurement_unit="г"
+            )
+            for number in range(5)
+        ]
+        for number in range(cls.recipes_count):
+            recipe = Recipe.objects.create(
+                name=f"Рецепт {number}",
+                author=cls.authors[number % len(cls.authors)],
+                text="Описание",
+                cooking_time=number + 1,
+                image="img/recipe.png",
+                thumbnail="img/recipe_thumb.png" if number % 2 else "",
+            )
+            shift = number % len(cls.tags)
+            for tag in cls.tags[shift:] + cls.tags[:shift][::-1]:
+                recipe.tags.add(tag)
+            RecipeIngredient.objects.bulk_create(
+                RecipeIngredient(
+                    recipe=recipe, ingredient=ingredient, amount=number + 1
+                )
+                for ingredient in cls.ingredients[: number % 5 + 1]
+            )
+            if number % 3 == 0:
+                Favourite.objects.create(user=cls.user, recipe=recipe)
+            if number % 4 == 0:
+                ShoppingCart.objects.create(user=cls.user, recipe=recipe)
+        Subscribe.objects.create(user=cls.user, author=cls.authors[0])
+
+    def setUp(self):
+        cache.clear()
+        strict_budgets = override_settings(QUERY_BUDGET_STRICT=True)
+        strict_budgets.enable()
+        self.addCleanup(strict_budgets.disable)
+        self.anonymous = APIClient()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+
+class RecipeListQueriesTest(RecipeDataMixin, TestCase):
+    def assert_list_queries(self, client, queries):
+        for limit in (6, 50):
+            with self.subTest(limit=limit):
+                cache.clear()
+                with self.assertNumQueries(queries):
+                    response = client.get(f"/api/recipes/?limit={limit}")
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.data["results"]), limit)
+
+    def test_anonymous_list_queries(self):
+        self.assert_list_queries(self.anonymous, 4)
+
+    def test_authenticated_list_queries(self):
+        self.assert_list_queries(self.client, 4)
+
+    def test_cached_representations_queries(self):
+        for limit in (6, 50):
+            with self.subTest(limit=limit):
+                self.client.get(f"/api/recipes/?limit={limit}")
+                with self.assertNumQueries(2):
+                    self.client.get(f"/api/recipes/?limit={limit}")
+
+
+@override_settings(QUERY_BUDGET_STRICT=True)
+class CursorPaginationTest(RecipeDataMixin, TestCase):
+    def walk(self, client, url):
+        ids = []
+        while url:
+            response = client.get(url)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            self.assertIsNone(data["previous"])
+            ids.extend(recipe["id"] for recipe in data["results"])
+            url = data["next"]
+        return ids, data["count"]
+
+    def test_cursor_walks_all_recipes_newest_first(self):
+        expected = list(
+            Recipe.objects.order_by("-id").values_list("id", flat=True)
+        )
+        for client in (self.anonymous, self.client):
+            with self.subTest(client=client):
+                ids, count = self.walk(
+                    client, "/api/recipes/?limit=25&cursor="
+                )
+                self.assertEqual(ids, expected)
+                self.assertEqual(count, self.recipes_count)
+
+    def test_cursor_page_after_last_id(self):
+        last_id = Recipe.objects.order_by("-id").values_list("id", flat=True)[
+            9
+        ]
+        response = self.client.get(
+            f"/api/recipes/?limit=5&cursor={last_id}&count=false"
+        )
+        data = response.json()
+        self.assertIsNone(data["count"])
+        self.assertEqual(
+            [recipe["id"] for recipe in data["results"]],
+            list(range(last_id - 1, last_id - 6, -1)),
+        )
+
+    def test_invalid_cursor(self):
+        response = self.client.get("/api/recipes/?limit=5&cursor=abc")
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(QUERY_BUDGET_STRICT=True)
+class CatalogTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        ingredient_catalog._state = None
+        Ingredient.objects.create(name="Соль", measurement_unit="г")
+        self.client = APIClient()
+
+    def add_from_other_process(self):
+        Ingredient.objects.bulk_create(
+            [Ingredient(name="Сахар", measurement_unit="г")]
+        )
+        return Ingredient.objects.get(name="Сахар")
+
+    def expire_state(self):
+        ingredient_catalog._state.loaded_at -= settings.CATALOG_STATE_TIMEOUT
+
+    def test_state_expires_without_version_bump(self):
+        response = self.client.get("/api/ingredients/")
+        self.add_from_other_process()
+        self.assertEqual(len(self.client.get("/api/ingredients/").json()), 1)
+
+        self.expire_state()
+        fresh = self.client.get(
+            "/api/ingredients/", HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(fresh.status_code, 200)
+        self.assertEqual(len(fresh.json()), 2)
+        self.assertNotEqual(fresh["ETag"], response["ETag"])
+
+    def test_unknown_ingredient_reloads_catalog(self):
+        ingredient_catalog.get_state()
+        ingredient = self.add_from_other_process()
+
+        with override_settings(CATALOG_RELOAD_INTERVAL=0):
+            state = ingredient_catalog.get_state()
+            self.assertNotIn(ingredient.id, state.by_id)
+            validated = RecipeCreateUpdateSerializer().validate_ingredients(
+                [{"ingredient": {"id": ingredient.id}, "amount": 1}]
+            )
+        self.assertEqual(validated[0]["ingredient"], ingredient)
+
+    def test_unknown_tag_reloads_catalog(self):
+        tag_catalog._state = None
+        tag_catalog.get_state()
+        Tag.objects.bulk_create(
+            [Tag(name="Завтрак", color="#E26C2D", slug="breakfast")]
+        )
+        tag = Tag.objects.get(slug="breakfast")
+
+        field = RecipeCreateUpdateSerializer().fields["tags"].child_relation
+        with override_settings(CATALOG_RELOAD_INTERVAL=0):
+            self.assertEqual(field.to_internal_value(tag.id), tag)
+
+    def test_search_index_follows_reloaded_state(self):
+        self.client.get("/api/ingredients/?name=са")
+        self.add_from_other_process()
+
+        self.expire_state()
+        response = self.client.get("/api/ingredients/?name=са")
+        self.assertEqual([item["name"] for item in response.json()], ["Сахар"])
+
+
+class ImportIngredientsTest(TestCase):
+    def setUp(self):
+        self.salt = Ingredient.objects.create(
+            name="Соль", measurement_unit="г"
+        )
+        self.sugar = Ingredient.objects.create(
+            name="Сахар", measurement_unit="г"
+        )
+
+    def import_rows(self, rows, *args):
+        with tempfile.NamedTemporaryFile(
+            "w", suffix=".jsonl", encoding="UTF-8", delete=False
+        ) as f:
+            f.writelines(json.dumps(row) + "\n" for row in rows)
+        self.addCleanup(os.remove, f.name)
+        stdout, stderr = io.StringIO(), io.StringIO()
+        call_command(
+            "import_ingredients", f.name, *args, stdout=stdout, stderr=stderr
+        )
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_creates_only_missing_ingredients(self):
+        stdout, _ = self.import_rows(
+            [
+                {"name": "Соль", "measurement_unit": "г"},
+                {"name": " Перец ", "measurement_unit": "г"},
+                {"name": "Перец", "measurement_unit": "г"},
+            ]
+        )
+        self.assertIn("Добавлено ингредиентов: 1, обновлено: 0", stdout)
+        self.assertTrue(
+            Ingredient.objects.filter(
+                name="Перец", measurement_unit="г"
+            ).exists()
+        )
+
+    def test_update_counts_changed_rows_and_follows_renames(self):
+        stdout, stderr = self.import_rows(
+            [
+                {"id": self.salt.id, "name": "Соль", "measurement_unit": "г"},
+                {"id": self.sugar.id, "name": "Мёд", "measurement_unit": "г"},
+                {"id": self.salt.id, "name": "Сахар", "measurement_unit": "г"},
+                {"name": "Соль", "measurement_unit": "г"},
+            ],
+            "--update",
+        )
+        self.assertEqual(stderr, "")
+        self.assertIn("Добавлено ингредиентов: 1, обновлено: 2", stdout)
+        self.assertEqual(
+            set(Ingredient.objects.values_list("name", flat=True)),
+            {"Мёд", "Сахар", "Соль"},
+        )
+        self.salt.refresh_from_db()
+        self.assertEqual(self.salt.name, "Сахар")
+
+    def test_update_reports_name_collisions(self):
+        stdout, stderr = self.import_rows(
+            [
+                {"id": self.salt.id, "name": "Сахар", "measurement_unit": "г"},
+                {"name": "Перец", "measurement_unit": "г"},
+                {
+                    "id": self.sugar.id,
+                    "name": "Перец",
+                    "measurement_unit": "г",
+                },
+            ],
+            "--update",
+            "--batch-size",
+            "1",
+        )
+        self.assertIn(f"Ингредиент с id {self.salt.id} не", stderr)
+        self.assertIn(f"Ингредиент с id {self.sugar.id} не", stderr)
+        self.assertIn("Добавлено ингредиентов: 1, обновлено: 0", stdout)
+        self.salt.refresh_from_db()
+        self.assertEqual(self.salt.name, "Соль")
+
+
+class UserRecipesTest(RecipeDataMixin, TestCase):
+    def test_repeated_favorite_add_counts_once(self):
+        recipe = Recipe.objects.get(name="Рецепт 1")
+        added = add_user_recipes(Favourite, self.user, [recipe.pk, recipe.pk])
+        self.assertEqual(added, [recipe])
+        self.assertEqual(
+            add_user_recipes(Favourite, self.user, [recipe.pk]), []
+        )
+
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.favorites_count, 1)
+        self.assertEqual(
+            Favourite.objects.filter(user=self.user, recipe=recipe).count(), 1
+        )
+
+    def test_bulk_add_skips_existing_and_duplicate_ids(self):
+        favorited = Recipe.objects.get(name="Рецепт 0")
+        first, second = Recipe.objects.filter(
+            name__in=["Рецепт 1", "Рецепт 2"]
+        )
+        response = self.client.post(
+            "/api/recipes/favorite/",
+            {"ids": [second.pk, favorited.pk, first.pk, second.pk]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            [recipe["id"] for recipe in response.json()],
+            [second.pk, first.pk],
+        )
+        self.assertEqual(
+            dict(
+                Recipe.objects.filter(
+                    pk__in=[favorited.pk, first.pk, second.pk]
+                ).values_list("pk", "favorites_count")
+            ),
+            {favorited.pk: 1, first.pk: 1, second.pk: 1},
+        )
+
+    def test_bulk_add_with_missing_ids_adds_nothing(self):
+        recipe = Recipe.objects.get(name="Рецепт 1")
+        response = self.client.post(
+            "/api/recipes/favorite/",
+            {"ids": [recipe.pk, 10_000]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertIn("10000", response.json()["errors"])
+        self.assertFalse(
+            Favourite.objects.filter(user=self.user, recipe=recipe).exists()
+        )
+
+    def test_bulk_remove_ignores_absent_ids(self):
+        favorited = Recipe.objects.get(name="Рецепт 0")
+        other = Recipe.objects.get(name="Рецепт 1")
+        response = self.client.delete(
+            "/api/recipes/favorite/",
+            {"ids": [favorited.pk, other.pk, 10_000]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(
+            Favourite.objects.filter(user=self.user, recipe=favorited).exists()
+        )
+        favorited.refresh_from_db()
+        self.assertEqual(favorited.favorites_count, 0)
+
+        response = self.client.delete(
+            "/api/recipes/favorite/",
+            {"ids": [favorited.pk, 10_000]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_bulk_requests_need_ids(self):
+        for method in (self.client.post, self.client.delete):
+            response = method(
+                "/api/recipes/shopping_cart/", {"ids": []}, format="json"
+            )
+            self.assertEqual(response.status_code, 400)
+
+    def test_deleted_user_releases_favorites(self):
+        recipe_ids = list(
+            Favourite.objects.filter(user=self.user).values_list(
+                "recipe_id", flat=True
+            )
+        )
+        self.user.delete()
+        self.assertFalse(
+            Recipe.objects.filter(
+                pk__in=recipe_ids, favorites_count__gt=0
+            ).exists()
+        )
+
+    def test_bulk_favorite_removal_queries(self):
+        recipe_ids = list(
+            Favourite.objects.filter(user=self.user).values_list(
+                "recipe_id", flat=True
+            )
+        )
+        with self.assertNumQueries(6):
+            response = self.client.delete(
+                "/api/recipes/favorite/",
+                {"ids": recipe_ids},
+                format="json",
+            )
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Favourite.objects.filter(user=self.user).exists())
+        self.assertFalse(
+            Recipe.objects.filter(
+                pk__in=recipe_ids, favorites_count__gt=0
+            ).exists()
+        )
+
+
+class TagFilterTest(RecipeDataMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.lunch = Tag.objects.create(
+            name="Обед", color="#49B64E", slug="lunch"
+        )
+        self.lunch_recipes = list(Recipe.objects.all()[:2])
+        self.lunch.recipes.add(*self.lunch_recipes)
+
+    def get_ids(self, client, tags):
+        response = client.get("/api/recipes/", {"tags": tags, "limit": 100})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        ids = [recipe["id"] for recipe in data["results"]]
+        self.assertEqual(data["count"], len(ids))
+        return ids
+
+    def test_single_tag(self):
+        for client in (self.anonymous, self.client):
+            with self.subTest(client=client):
+                self.assertEqual(
+                    self.get_ids(client, ["lunch"]),
+                    [recipe.pk for recipe in self.lunch_recipes],
+                )
+
+    def test_several_tags_do_not_duplicate_recipes(self):
+        ids = self.get_ids(self.client, ["lunch", self.tags[0].slug])
+        self.assertEqual(len(ids), self.recipes_count)
+        self.assertEqual(len(set(ids)), self.recipes_count)
+
+    def test_unknown_tag(self):
+        response = self.client.get("/api/recipes/", {"tags": ["missing"]})
+        self.assertEqual(response.status_code, 400)
+
+
+class SubscriptionsTest(RecipeDataMixin, TestCase):
+    def get_subscriptions(self, recipes_limit):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                "/api/users/subscriptions/",
+                {"limit": 10, "recipes_limit": recipes_limit},
+            )
+        self.assertEqual(response.status_code, 200)
+        return response.json()["results"], len(queries)
+
+    def latest_recipe_ids(self, author_id, limit):
+        return list(
+            Recipe.objects.filter(author_id=author_id).values_list(
+                "id", flat=True
+            )[:limit]
+        )
+
+    def test_recipes_limit_keeps_latest_recipes_per_author(self):
+        _, single_author_queries = self.get_subscriptions(2)
+        Subscribe.objects.bulk_create(
+            Subscribe(user=self.user, author=author)
+            for author in self.authors[1:]
+        )
+        results, queries = self.get_subscriptions(2)
+
+        self.assertEqual(queries, single_author_queries)
+        self.assertEqual(len(results), len(self.authors))
+        for author in results:
+            self.assertEqual(
+                [recipe["id"] for recipe in author["recipes"]],
+                self.latest_recipe_ids(author["id"], 2),
+            )
+            self.assertEqual(
+                author["recipes_count"],
+                self.recipes_count // len(self.authors),
+            )
+
+    def test_subscribe_response_respects_recipes_limit(self):
+        author = self.authors[1]
+        response = self.client.post(
+            f"/api/users/{author.id}/subscribe/?recipes_limit=1"
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            [recipe["id"] for recipe in response.json()["recipes"]],
+            self.latest_recipe_ids(author.id, 1),
+        )
+
+    def test_invalid_recipes_limit(self):
+        for value in ("-1", "many"):
+            response = self.client.get(
+                "/api/users/subscriptions/", {"recipes_limit": value}
+            )
+            self.assertEqual(response.status_code, 400)
+
+
+class RecipeUpdateTest(RecipeDataMixin, TestCase):
+    def update(self, recipe):
+        serializer = RecipeCreateUpdateSerializer(
+            recipe,
+            data={
+                "name": "Новое название",
+                "text": recipe.text,
+                "cooking_time": 10,
+                "tags": [tag.id for tag in self.tags],
+                "ingredients": [{"id": self.ingredients[0].id, "amount": 1}],
+            },
+            partial=True,
+        )
+        serializer.is_valid(raise_exception=True)
+        return serializer.save()
+
+    def test_update_keeps_rendered_images(self):
+        recipe = Recipe.objects.get(name="Рецепт 0")
+        Recipe.objects.filter(pk=recipe.pk).update(
+            image="img/rendered.webp", thumbnail="img/rendered_thumb.webp"
+        )
+        self.update(recipe)
+
+        recipe = Recipe.objects.get(pk=recipe.pk)
+        self.assertEqual(recipe.name, "Новое название")
+        self.assertEqual(recipe.image.name, "img/rendered.webp")
+        self.assertEqual(recipe.thumbnail.name, "img/rendered_thumb.webp")
+
+    def test_patch_reconciles_ingredients_in_place(self):
+        recipe = Recipe.objects.get(name="Рецепт 2")
+        kept, changed, removed = self.ingredients[:3]
+        before = dict(
+            recipe.recipe_ingredients.values_list("ingredient_id", "id")
+        )
+        client = APIClient()
+        client.force_authenticate(recipe.author)
+        response = client.patch(
+            f"/api/recipes/{recipe.pk}/",
+            {
+                "tags": [self.tags[0].id],
+                "ingredients": [
+                    {"id": kept.id, "amount": 3},
+                    {"id": changed.id, "amount": 5},
+                    {"id": self.ingredients[3].id, "amount": 4},
+                ],
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+
+        rows = {
+            row.ingredient_id: row for row in recipe.recipe_ingredients.all()
+        }
+        self.assertEqual(
+            {pk: row.amount for pk, row in rows.items()},
+            {kept.id: 3, changed.id: 5, self.ingredients[3].id: 4},
+        )
+        self.assertEqual(rows[kept.id].id, before[kept.id])
+        self.assertEqual(rows[changed.id].id, before[changed.id])
+        self.assertNotIn(removed.id, rows)
+        self.assertEqual(
+            [item["amount"] for item in response.json()["ingredients"]],
+            [3, 5, 4],
+        )
+
+
+class MetricsTest(RecipeDataMixin, TestCase):
+    def test_server_timing_is_off_by_default(self):
+        response = self.client.get("/api/recipes/?limit=6")
+        self.assertNotIn("Server-Timing", response)
+
+    @override_settings(SERVER_TIMING=True)
+    def test_server_timing_reports_serialization(self):
+        response = self.client.get("/api/recipes/?limit=6")
+        self.assertRegex(response["Server-Timing"], r"\bser;dur=\d")
+
+    def test_metrics_are_not_public(self):
+        response = self.anonymous.get(
+            "/api/metrics/", REMOTE_ADDR="203.0.113.1"
+        )
+        self.assertEqual(response.status_code, 403)
+
+    def test_metrics_allowed_for_staff_and_allowed_ips(self):
+        self.assertEqual(self.anonymous.get("/api/metrics/").status_code, 200)
+        staff = User.objects.create_user(
+            username="staff", email="staff@example.com", is_staff=True
+        )
+        self.anonymous.force_login(staff)
+        response = self.anonymous.get(
+            "/api/metrics/", REMOTE_ADDR="203.0.113.1"
+        )
+        self.assertContains(response, "foodgram_serializer_seconds_total")
+
+    def test_metrics_include_other_processes(self):
+        other_process = MetricsRegistry()
+        recorder = RequestRecorder()
+        recorder.queries = 3
+        other_process.observe("api:tag-list", "GET", recorder, 0.25, 10, 0)
+        other_process.flush()
+
+        response = self.anonymous.get("/api/metrics/")
+        self.assertContains(
+            response,
+            'foodgram_queries_total{view="api:tag-list",method="GET"} 3',
+        )
+        self.assertContains(
+            response,
+            'foodgram_duration_seconds_total{view="api:tag-list",'
+            'method="GET"} 0.25',
+        )
+
+
+class RecipeVersionTest(RecipeDataMixin, TestCase):
+    def test_save_increments_stored_version(self):
+        recipe = Recipe.objects.get(name="Рецепт 0")
+        stale = Recipe.objects.get(pk=recipe.pk)
+        recipe.save()
+        stale.save()
+        self.assertEqual(stale.version, 3)
+        self.assertEqual(Recipe.objects.get(pk=recipe.pk).version, 3)
+
+    def test_deleted_author_invalidates_cached_recipes(self):
+        author = self.authors[1]
+        recipe = author.recipes.first()
+        url = f"/api/recipes/{recipe.pk}/"
+        etag = self.anonymous.get(url)["ETag"]
+        self.anonymous.get("/api/recipes/?limit=50")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            author.delete()
+
+        response = self.anonymous.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.json()["author"])
+        results = self.anonymous.get("/api/recipes/?limit=50").json()
+        self.assertIsNone(
+            next(
+                item["author"]
+                for item in results["results"]
+                if item["id"] == recipe.pk
+            )
+        )
+
+
+class RecipeRepresentationTest(RecipeDataMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Recipe.objects.filter(name="Рецепт 2").update(author=None)
+
+    def get_recipes(self, user):
+        request = Request(APIRequestFactory().get("/api/recipes/"))
+        request.user = user
+        recipes = list(RecipeViewSet(request=request).get_queryset())
+        return request, recipes
+
+    def assert_same_json(self, first, second):
+        self.assertEqual(
+            JSONRenderer().render(first), JSONRenderer().render(second)
+        )
+
+    def assert_equivalent(self, user):
+        request, recipes = self.get_recipes(user)
+        context = {"request": request}
+        expected = RecipeGetSerializer(
+            recipes, many=True, context=context
+        ).data
+        self.assert_same_json(represent_recipes(recipes, request), expected)
+
+        thumbnails = RecipeShortSerializer(
+            recipes, many=True, context=context
+        ).data
+        for item, short in zip(expected, thumbnails):
+            item["image"] = short["image"]
+        self.assert_same_json(
+            represent_recipes(recipes, request, thumbnails=True), expected
+        )
+
+    def test_anonymous_representations(self):
+        self.assert_equivalent(AnonymousUser())
+
+    def test_authenticated_representations(self):
+        self.assert_equivalent(self.user)
+
+    def test_short_representations(self):
+        request, recipes = self.get_recipes(self.user)
+        self.assert_same_json(
+            represent_short_recipes(recipes),
+            RecipeShortSerializer(recipes, many=True).data,
+        )
+        self.assert_same_json(
+            represent_short_recipes(recipes, request),
+            RecipeShortSerializer(
+                recipes, many=True, context={"request": request}
+            ).data,
+        )
+
+
+class AsyncFastPathTest(RecipeDataMixin, TestCase):
+    factory = APIRequestFactory()
+
+    def assert_same_response(self, fast, response):
+        self.assertEqual(fast.status_code, 200)
+        self.assertEqual(json.loads(fast.content), response.json())
+        self.assertEqual(fast["ETag"], response["ETag"])
+
+    def test_feed_fast_path_serves_cached_page(self):
+        fast_path = FAST_PATHS["recipe-list"]
+        url = "/api/recipes/?limit=6"
+        self.assertIsNone(fast_path(self.factory.get(url)))
+
+        response = self.anonymous.get(url)
+        fast = fast_path(self.factory.get(url))
+        self.assert_same_response(fast, response)
+        self.assertIn("Authorization", fast["Vary"])
+        self.assertIsNone(
+            fast_path(self.factory.get("/api/recipes/?is_favorited=1"))
+        )
+
+        not_modified = fast_path(
+            self.factory.get(url, HTTP_IF_NONE_MATCH=fast["ETag"])
+        )
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_catalog_fast_paths_serve_loaded_state(self):
+        tag = self.tags[0]
+        list_path = FAST_PATHS["tag-list"]
+        detail_path = FAST_PATHS["tag-detail"]
+        self.assertIsNone(list_path(self.factory.get("/api/tags/")))
+
+        response = self.anonymous.get("/api/tags/")
+        self.assert_same_response(
+            list_path(self.factory.get("/api/tags/")), response
+        )
+        self.assertIsNone(list_path(self.factory.get("/api/tags/?x=1")))
+        self.assert_same_response(
+            detail_path(self.factory.get(f"/api/tags/{tag.id}/"), str(tag.id)),
+            self.anonymous.get(f"/api/tags/{tag.id}/"),
+        )
+        self.assertIsNone(detail_path(self.factory.get("/"), "999"))
+        self.assertIsNone(detail_path(self.factory.get("/"), "x"))
+
+        not_modified = list_path(
+            self.factory.get("/api/tags/", HTTP_IF_NONE_MATCH=response["ETag"])
+        )
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_async_view_uses_fast_path_for_anonymous_reads_only(self):
+        cached = HttpResponse("cached")
+        view = mock.Mock(return_value=HttpResponse("view"))
+        fast_path = mock.Mock(return_value=cached)
+        async_view = async_to_sync(async_read_view(view, fast_path))
+
+        self.assertIs(async_view(self.factory.get("/api/tags/")), cached)
+        for request in (
+            self.factory.get("/api/tags/", HTTP_AUTHORIZATION="Token x"),
+            self.factory.get("/api/tags/", HTTP_ACCEPT="text/html"),
+            self.factory.post("/api/tags/"),
+        ):
+            self.assertEqual(async_view(request).content, b"view")
+        self.assertEqual(fast_path.call_count, 1)
+
+        fast_path.return_value = None
+        self.assertEqual(
+            async_view(self.factory.get("/api/tags/")).content, b"view"
+        )
+
+
+@override_settings(CACHE_LOCK_POLL_INTERVAL=0.01)
+class CacheStampedeTest(SimpleTestCase):
+    namespace = CacheNamespace("stampede")
+
+    def setUp(self):
+        cache.clear()
+        self.key = self.namespace.make_key("page")
+
+    def test_concurrent_misses_compute_once(self):
+        calls = []
+        barrier = threading.Barrier(8)
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.1)
+            return "fresh"
+
+        def read(results):
+            barrier.wait()
+            results.append(
+                self.namespace.get_or_compute(self.key, compute, 60)
+            )
+
+        results = []
+        threads = [
+            threading.Thread(target=read, args=(results,)) for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ["fresh"] * 8)
+
+    def test_expired_entry_is_served_while_another_request_recomputes(self):
+        cache.set(self.key, ("stale", time.time() - 1, 0), None)
+        cache.add(f"{self.key}:lock", 1, 60)
+        compute = mock.Mock(return_value="fresh")
+
+        self.assertEqual(
+            self.namespace.get_or_compute(self.key, compute, 60), "stale"
+        )
+        compute.assert_not_called()
+
+    @override_settings(CACHE_LOCK_TIMEOUT=0.05)
+    def test_abandoned_lock_falls_back_to_computing(self):
+        cache.add(f"{self.key}:lock", 1, 60)
+        self.assertEqual(
+            self.namespace.get_or_compute(self.key, lambda: "fresh", 60),
+            "fresh",
+        )
+        self.assertEqual(self.namespace.get(self.key), "fresh")
+
+    def test_version_bump_invalidates_keys(self):
+        self.namespace.set(self.key, "cached", 60)
+        self.namespace.clear()
+        self.assertNotEqual(self.namespace.make_key("page"), self.key)
+
+
+class ReplicaRoutingTest(SimpleTestCase):
+    @mock.patch.dict(settings.DATABASES, {"replica": {}})
+    def test_primary_reads_bypass_replica(self):
+        router = PrimaryReplicaRouter()
+        token = replica_reads.set(True)
+        try:
+            self.assertEqual(router.db_for_read(Recipe), "replica")
+            with primary_reads():
+                self.assertEqual(router.db_for_read(Recipe), "default")
+            self.assertEqual(router.db_for_read(Recipe), "replica")
+        finally:
+            replica_reads.reset(token)
+
+
+class ShoppingListUpdateTest(RecipeDataMixin, TestCase):
+    def assert_shopping_lists_consistent(self):
+        expected = (
+            RecipeIngredient.objects.filter(
+                recipe__shopping_cart__isnull=False
+            )
+            .order_by()
+            .values_list("recipe__shopping_cart__user", "ingredient")
+            .annotate(total=Sum("amount"))
+        )
+        self.assertEqual(
+            {
+                (user, ingredient): total
+                for user, ingredient, total in expected
+            },
+            {
+                (item.user_id, item.ingredient_id): item.total_amount
+                for item in ShoppingListItem.objects.all()
+            },
+        )
+
+    def replace_ingredients(self, name, ingredients):
+        recipe = Recipe.objects.get(name=name)
+        client = APIClient()
+        client.force_authenticate(recipe.author)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.patch(
+                f"/api/recipes/{recipe.pk}/",
+                {
+                    "tags": [self.tags[0].id],
+                    "ingredients": [
+                        {"id": ingredient.id, "amount": 7}
+                        for ingredient in ingredients
+                    ],
+                },
+                format="json",
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assert_shopping_lists_consistent()
+        return len(queries)
+
+    def test_replaced_ingredients_update_shopping_lists_in_bulk(self):
+        ingredient_catalog.get_state()
+        tag_catalog.get_state()
+        self.assertEqual(
+            self.replace_ingredients("Рецепт 0", self.ingredients[1:]),
+            self.replace_ingredients("Рецепт 8", self.ingredients[4:]),
+        )
+
+    def test_admin_ingredient_removal_updates_shopping_lists(self):
+        recipe = Recipe.objects.get(name="Рецепт 4")
+        site._registry[RecipeIngredient].delete_queryset(
+            None, RecipeIngredient.objects.filter(recipe=recipe)
+        )
+        self.assertFalse(recipe.recipe_ingredients.exists())
+        self.assert_shopping_lists_consistent()
+
+    def test_bulk_cart_removal_updates_shopping_list(self):
+        recipe_ids = list(
+            ShoppingCart.objects.filter(user=self.user).values_list(
+                "recipe_id", flat=True
+            )
+        )
+        with self.assertNumQueries(8):
+            response = self.client.delete(
+                "/api/recipes/shopping_cart/",
+                {"ids": recipe_ids[:10]},
+                format="json",
+            )
+        self.assertEqual(response.status_code, 204)
+        self.assert_shopping_lists_consistent()
+
+    def test_repeated_cart_add_counts_once(self):
+        recipe = Recipe.objects.get(name="Рецепт 1")
+        url = f"/api/recipes/{recipe.pk}/shopping_cart/"
+        self.assertEqual(self.client.post(url).status_code, 201)
+        self.assertEqual(self.client.post(url).status_code, 400)
+        response = self.client.post(
+            "/api/recipes/shopping_cart/",
+            {"ids": [recipe.pk, recipe.pk]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json(), [])
+        self.assert_shopping_lists_consistent()
+
+    def test_admin_cart_removal_updates_shopping_list(self):
+        model_admin = site._registry[ShoppingCart]
+        cart_ids = list(
+            ShoppingCart.objects.filter(user=self.user).values_list(
+                "pk", flat=True
+            )
+        )
+        model_admin.delete_queryset(
+            None, ShoppingCart.objects.filter(pk__in=cart_ids[:3])
+        )
+        model_admin.delete_model(
+            None, ShoppingCart.objects.filter(user=self.user).first()
+        )
+        self.assertEqual(
+            ShoppingCart.objects.filter(user=self.user).count(), 11
+        )
+        self.assert_shopping_lists_consistent()
+
+
+class RecipeValidatorsTest(RecipeDataMixin, TestCase):
+    def test_list_has_no_last_modified(self):
+        response = self.anonymous.get("/api/recipes/?limit=3")
+        self.assertNotIn("Last-Modified", response)
+        Recipe.objects.get(pk=response.json()["results"][0]["id"]).delete()
+
+        response = self.anonymous.get(
+            "/api/recipes/?limit=3",
+            HTTP_IF_MODIFIED_SINCE="Fri, 01 Jan 2100 00:00:00 GMT",
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_authenticated_responses_are_private(self):
+        recipe = Recipe.objects.first()
+        for url in ("/api/recipes/?limit=3", f"/api/recipes/{recipe.pk}/"):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertNotIn("Last-Modified", response)
+                self.assertIn("private", response["Cache-Control"])
+                self.assertIn("no-cache", response["Cache-Control"])
+                self.assertIn("Authorization", response["Vary"])
+
+    def test_anonymous_detail_varies_on_authorization(self):
+        recipe = Recipe.objects.first()
+        response = self.anonymous.get(f"/api/recipes/{recipe.pk}/")
+        self.assertIn("Last-Modified", response)
+        self.assertIn("Authorization", response["Vary"])
+        self.assertFalse(response.has_header("Cache-Control"))
+
+
+class WorkerTest(SimpleTestCase):
+    @mock.patch("jobs.management.commands.run_worker.time.sleep")
+    @mock.patch("jobs.management.commands.run_worker.close_old_connections")
+    @mock.patch(
+        "jobs.management.commands.run_worker.claim_job",
+        side_effect=[OperationalError("gone"), OperationalError("gone"), None],
+    )
+    def test_worker_retries_after_database_errors(
+        self, claim_job, close_old_connections, sleep
+    ):
+        stdout, stderr = io.StringIO(), io.StringIO()
+        call_command("run_worker", once=True, stdout=stdout, stderr=stderr)
+
+        self.assertEqual(claim_job.call_count, 3)
+        self.assertEqual(close_old_connections.call_count, 3)
+        first, second = (call.args[0] for call in sleep.call_args_list)
+        self.assertEqual(second, first * 2)
+        self.assertIn("Выполнено задач: 0", stdout.getvalue())
+
+
+class ORJSONTest(SimpleTestCase):
+    data = {
+        "name": "Борщ\u2028с\u2029пампушками",
+        "amount": Decimal("1.50"),
+        "created": datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc),
+        "uid": UUID("12345678-1234-5678-1234-567812345678"),
+        "tags": [{"id": 1, "slug": "lunch"}, None, True],
+        1: "int key",
+    }
+
+    def test_render_matches_drf(self):
+        self.assertEqual(
+            ORJSONRenderer().render(self.data),
+            JSONRenderer().render(self.data),
+        )
+
+    def test_indent_falls_back_to_drf(self):
+        media_type = "application/json; indent=2"
+        self.assertEqual(
+            ORJSONRenderer().render(self.data, media_type),
+            JSONRenderer().render(self.data, media_type),
+        )
+
+    def test_round_trip(self):
+        content = ORJSONRenderer().render(self.data)
+        self.assertEqual(
+            ORJSONParser().parse(io.BytesIO(content)),
+            json.loads(JSONRenderer().render(self.data)),
+        )
+
+    def test_invalid_json(self):
+        with self.assertRaises(ParseError):
+            ORJSONParser().parse(io.BytesIO(b'{"ids": [1,'))
@@ -1,7 +1,9 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import IngredientViewSet, RecipeViewSet, TagViewSet
+from .async_views import async_read_urls
+from .views import IngredientViewSet, RecipeViewSet, TagViewSet, metrics
 
 app_name = "api"
 
@@ -11,6 +13,11 @@ router.register("ingredients", IngredientViewSet)
 router.register("tags", TagViewSet)
 router.register("recipes", RecipeViewSet)
 
+router_urls = router.urls
+if settings.SERVER_INTERFACE == "asgi":
+    router_urls = async_read_urls(router_urls)
+
 urlpatterns = [
-    path("", include(router.urls)),
+    path("metrics/", metrics, name="metrics"),
+    path("", include(router_urls)),
 ]
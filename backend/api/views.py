@@ -1,25 +1,73 @@
-from django.db.models import Exists, OuterRef
-from django.http import FileResponse
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import PermissionDenied
+from django.db.models import BooleanField, Exists, OuterRef, Value
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import http_date, parse_etags
 from django_filters.rest_framework import DjangoFilterBackend
 from recipes.models import Favourite, Ingredient, Recipe, ShoppingCart, Tag
 from rest_framework import status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import SAFE_METHODS, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
+from users.models import Subscribe
 
+from .cache import (
+    get_feed_cache_key,
+    get_feed_page,
+    get_recipe_etag,
+    get_recipe_representations,
+    is_feed_cacheable,
+)
+from .catalog import ingredient_catalog, tag_catalog
 from .filters import IngredientFilter, RecipeFilter
+from .metrics import registry
 from .paginations import CustomPagination
 from .permissions import IsAdminOrReadOnly, IsAuthorOrReadOnly
+from .representations import (
+    ingredient_representation,
+    represent_recipes,
+    tag_representation,
+)
 from .serializers import (
     IngredientSerializer,
     RecipeCreateUpdateSerializer,
     RecipeGetSerializer,
+    RecipeIdsSerializer,
     RecipeShortSerializer,
     TagSerializer,
 )
-from .services import get_shopping_list
+from .services import (
+    SHOPPING_LIST_EXPORTERS,
+    add_user_recipes,
+    get_shopping_list,
+    remove_user_recipes,
+)
+
+User = get_user_model()
+
+
+def is_not_modified(request, etag):
+    etags = parse_etags(request.headers.get("If-None-Match", ""))
+    return etag in etags or "*" in etags
+
+
+def set_validators(response, etag, last_modified=None, private=False):
+    response["ETag"] = etag
+    patch_vary_headers(response, ["Authorization"])
+    if private:
+        patch_cache_control(response, private=True, no_cache=True)
+    elif last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    return response
 
 
 class RecipeViewSet(ModelViewSet):
@@ -33,25 +81,108 @@ class RecipeViewSet(ModelViewSet):
         serializer.save(author=self.request.user)
 
     def get_queryset(self):
-        if self.request.user.is_authenticated:
-            user = self.request.user
+        queryset = Recipe.objects.select_related("author")
+
+        if self.request.user.is_anonymous:
+            return queryset.annotate(
+                is_favorited=Value(False, output_field=BooleanField()),
+                is_in_shopping_cart=Value(False, output_field=BooleanField()),
+                author_is_subscribed=Value(False, output_field=BooleanField()),
+            )
+
+        user = self.request.user
+
+        is_favourited_subquery = Favourite.objects.filter(
+            user=user, recipe=OuterRef("pk")
+        )
+        is_in_shopping_cart_subquery = ShoppingCart.objects.filter(
+            user=user, recipe=OuterRef("pk")
+        )
+        is_subscribed_subquery = Subscribe.objects.filter(
+            user=user, author=OuterRef("author")
+        )
 
-            is_favourited_subquery = Favourite.objects.filter(
-                user=user, recipe=OuterRef("pk")
+        return queryset.annotate(
+            is_favorited=Exists(is_favourited_subquery),
+            is_in_shopping_cart=Exists(is_in_shopping_cart_subquery),
+            author_is_subscribed=Exists(is_subscribed_subquery),
+        )
+
+    def serialize_recipes(self, recipes):
+        return represent_recipes(
+            recipes, self.request, thumbnails=self.action == "list"
+        )
+
+    def check_not_modified(self, request, etag, last_modified=None):
+        if request.user.is_authenticated:
+            last_modified = None
+        return get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+
+    def get_recipes_page(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+        recipes = self.paginate_queryset(queryset)
+        paginated = recipes is not None
+        if paginated:
+            etag = get_recipe_etag(
+                recipes,
+                request.build_absolute_uri(),
+                self.paginator.get_count(),
+                self.paginator.get_next_link(),
             )
-            is_in_shopping_cart_subquery = ShoppingCart.objects.filter(
-                user=user, recipe=OuterRef("pk")
+        else:
+            recipes = list(queryset)
+            etag = get_recipe_etag(recipes, request.build_absolute_uri())
+        return recipes, paginated, etag
+
+    def get_recipes_response(self, request, recipes, paginated):
+        data = get_recipe_representations(
+            request, recipes, "list", self.serialize_recipes
+        )
+        if paginated:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+    def build_feed_page(self, request):
+        recipes, paginated, etag = self.get_recipes_page(request)
+        response = self.get_recipes_response(request, recipes, paginated)
+        return etag, response.data
+
+    def list(self, request, *args, **kwargs):
+        if request.user.is_anonymous and is_feed_cacheable(request):
+            etag, data = get_feed_page(
+                get_feed_cache_key(request),
+                lambda: self.build_feed_page(request),
             )
+            response = self.check_not_modified(request, etag) or Response(data)
+            return set_validators(response, etag)
 
-            queryset = (
-                Recipe.objects.annotate(
-                    is_favorited=Exists(is_favourited_subquery),
-                    is_in_shopping_cart=Exists(is_in_shopping_cart_subquery),
-                )
-                .select_related("author")
-                .prefetch_related("tags")
+        recipes, paginated, etag = self.get_recipes_page(request)
+        response = self.check_not_modified(request, etag)
+        if response is None:
+            response = self.get_recipes_response(request, recipes, paginated)
+        return set_validators(
+            response, etag, private=request.user.is_authenticated
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        recipe = self.get_object()
+        etag = get_recipe_etag([recipe])
+        last_modified = int(recipe.updated_at.timestamp())
+
+        response = self.check_not_modified(request, etag, last_modified)
+        if response is None:
+            [data] = get_recipe_representations(
+                request, [recipe], "detail", self.serialize_recipes
             )
-            return queryset
+            response = Response(data)
+        return set_validators(
+            response,
+            etag,
+            last_modified,
+            private=request.user.is_authenticated,
+        )
 
     def get_serializer_class(self):
         if self.request.method in SAFE_METHODS:
@@ -74,48 +205,138 @@ class RecipeViewSet(ModelViewSet):
     def shopping_cart(self, request, pk):
         return self.add_or_delete_obj(request, pk, ShoppingCart)
 
+    @action(
+        detail=False,
+        methods=["post", "delete"],
+        permission_classes=[IsAuthenticated],
+        url_path="favorite",
+        url_name="favorite-bulk",
+    )
+    def favorite_bulk(self, request):
+        return self.add_or_delete_objs(request, Favourite)
+
+    @action(
+        detail=False,
+        methods=["post", "delete"],
+        permission_classes=[IsAuthenticated],
+        url_path="shopping_cart",
+        url_name="shopping-cart-bulk",
+    )
+    def shopping_cart_bulk(self, request):
+        return self.add_or_delete_objs(request, ShoppingCart)
+
     def add_or_delete_obj(self, request, pk, model):
-        recipe = get_object_or_404(Recipe, id=pk)
+        try:
+            pk = int(pk)
+        except ValueError:
+            raise Http404
         if request.method == "POST":
-            obj, created = model.objects.get_or_create(
-                user=request.user, recipe__id=pk
-            )
-            if obj.recipe.filter(id=pk):
+            added = add_user_recipes(model, request.user, [pk])
+            if not added:
                 return Response(
                     {"errors": "Already exist!"},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
-            obj.recipe.set([recipe])
-            serializer = RecipeShortSerializer(recipe)
+            serializer = RecipeShortSerializer(added[0])
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+        if remove_user_recipes(model, request.user, [pk]):
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        get_object_or_404(Recipe, id=pk)
+        return Response(status=status.HTTP_400_BAD_REQUEST)
+
+    def add_or_delete_objs(self, request, model):
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        recipe_ids = serializer.validated_data["ids"]
+        if request.method == "POST":
+            added = add_user_recipes(model, request.user, recipe_ids)
+            serializer = RecipeShortSerializer(added, many=True)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-        del_count, _ = model.objects.filter(
-            user=request.user, recipe__id=pk
-        ).delete()
-        if del_count:
+        if remove_user_recipes(model, request.user, recipe_ids):
             return Response(status=status.HTTP_204_NO_CONTENT)
         return Response(status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=False, permission_classes=[IsAuthenticated])
     def download_shopping_cart(self, request):
-        content_type = "text/plain"
+        file_type = request.query_params.get("type", "txt")
+        exporter_class = SHOPPING_LIST_EXPORTERS.get(file_type)
+        if exporter_class is None:
+            raise ValidationError({"type": ["Недопустимый формат файла"]})
+
         user = request.user
-        buffer = get_shopping_list(user)
-        response = FileResponse(buffer, content_type=content_type)
-        filename = f"{user.username}_cart.txt"
+        exporter = exporter_class()
+        response = StreamingHttpResponse(
+            exporter.render(get_shopping_list(user)),
+            content_type=exporter.content_type,
+        )
+        filename = f"{user.username}_cart.{exporter.extension}"
         response["Content-Disposition"] = f"attachment; filename={filename}"
         return response
 
 
-class IngredientViewSet(ReadOnlyModelViewSet):
+class CatalogViewMixin:
+    catalog = None
+    representation = None
+
+    def list(self, request, *args, **kwargs):
+        state = self.catalog.get_state()
+        if is_not_modified(request, state.etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        elif request.query_params:
+            queryset = self.filter_queryset(self.get_queryset())
+            rows = queryset.values_list(*self.representation.fields)
+            response = Response(
+                [self.representation.from_row(row) for row in rows]
+            )
+        else:
+            response = HttpResponse(
+                state.render(self.representation),
+                content_type="application/json",
+            )
+        response["ETag"] = state.etag
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        state = self.catalog.get_state()
+        try:
+            obj = state.by_id[int(kwargs[self.lookup_field])]
+        except (KeyError, ValueError):
+            raise Http404
+        if is_not_modified(request, state.etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(self.representation.from_object(obj))
+        response["ETag"] = state.etag
+        return response
+
+
+class IngredientViewSet(CatalogViewMixin, ReadOnlyModelViewSet):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     permission_classes = (IsAdminOrReadOnly,)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = IngredientFilter
+    catalog = ingredient_catalog
+    representation = ingredient_representation
 
 
-class TagViewSet(ReadOnlyModelViewSet):
+class TagViewSet(CatalogViewMixin, ReadOnlyModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = (IsAdminOrReadOnly,)
+    catalog = tag_catalog
+    representation = tag_representation
+
+
+def metrics(request):
+    if not (
+        request.user.is_staff
+        or request.META.get("REMOTE_ADDR") in settings.METRICS_ALLOWED_IPS
+    ):
+        raise PermissionDenied
+    return HttpResponse(
+        registry.render(),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
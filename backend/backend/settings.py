@@ -20,6 +20,7 @@ INSTALLED_APPS = [
     "users",
     "recipes",
     "api",
+    "jobs",
     "rest_framework",
     "djoser",
     "rest_framework.authtoken",
@@ -27,6 +28,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "api.middleware.QueryMetricsMiddleware",
+    "api.middleware.ReplicaRoutingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -55,6 +58,8 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "backend.wsgi.application"
+ASGI_APPLICATION = "backend.asgi.application"
+SERVER_INTERFACE = os.getenv("SERVER_INTERFACE", "wsgi")
 
 DATABASES = {
     "default": {
@@ -64,9 +69,36 @@ DATABASES = {
         "PASSWORD": os.getenv("POSTGRES_PASSWORD", ""),
         "HOST": os.getenv("DB_HOST", "localhost"),
         "PORT": os.getenv("DB_PORT", 5432),
+        "CONN_MAX_AGE": int(
+            os.getenv(
+                "DB_CONN_MAX_AGE", 0 if SERVER_INTERFACE == "asgi" else 60
+            )
+        ),
+        "DISABLE_SERVER_SIDE_CURSORS": (
+            os.getenv("DB_DISABLE_SERVER_SIDE_CURSORS") == "True"
+        ),
     }
 }
 
+DB_STATEMENT_TIMEOUT = int(os.getenv("DB_STATEMENT_TIMEOUT", 0))
+if DB_STATEMENT_TIMEOUT > 0:
+    DATABASES["default"]["OPTIONS"] = {
+        "options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT}"
+    }
+
+if os.getenv("DB_REPLICA_HOST"):
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "HOST": os.getenv("DB_REPLICA_HOST"),
+        "PORT": os.getenv("DB_REPLICA_PORT", DATABASES["default"]["PORT"]),
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_ROUTERS = ["api.db.PrimaryReplicaRouter"]
+
+DB_HEALTH_CHECKS = os.getenv("DB_HEALTH_CHECKS") == "True"
+DB_HEALTH_CHECK_IDLE = int(os.getenv("DB_HEALTH_CHECK_IDLE", 30))
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
@@ -106,6 +138,15 @@ REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework.authentication.TokenAuthentication",
     ),
+    "DEFAULT_RENDERER_CLASSES": (
+        "api.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "api.parsers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
 }
 
 DJOSER = {
@@ -117,3 +158,74 @@ DJOSER = {
 
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
+
+CACHE_BACKENDS = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+    "redis": "django_redis.cache.RedisCache",
+}
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "locmem")
+
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKENDS[CACHE_BACKEND],
+        "LOCATION": os.getenv(
+            "CACHE_LOCATION",
+            "/tmp/foodgram_cache" if CACHE_BACKEND == "file" else "",
+        ),
+        "KEY_PREFIX": os.getenv("CACHE_KEY_PREFIX", "foodgram"),
+        "VERSION": int(os.getenv("CACHE_VERSION", 1)),
+        "TIMEOUT": int(os.getenv("CACHE_TIMEOUT", 300)),
+    }
+}
+
+CACHE_LOCK_TIMEOUT = float(os.getenv("CACHE_LOCK_TIMEOUT", 5))
+CACHE_LOCK_POLL_INTERVAL = float(os.getenv("CACHE_LOCK_POLL_INTERVAL", 0.05))
+CACHE_EARLY_RECOMPUTE_BETA = float(os.getenv("CACHE_EARLY_RECOMPUTE_BETA", 1))
+CACHE_STATS_FLUSH_INTERVAL = float(os.getenv("CACHE_STATS_FLUSH_INTERVAL", 10))
+
+CATALOG_STATE_TIMEOUT = int(os.getenv("CATALOG_STATE_TIMEOUT", 60))
+CATALOG_RELOAD_INTERVAL = int(os.getenv("CATALOG_RELOAD_INTERVAL", 5))
+
+FEED_CACHE_TIMEOUT = int(os.getenv("FEED_CACHE_TIMEOUT", 300))
+RECIPE_CACHE_TIMEOUT = int(os.getenv("RECIPE_CACHE_TIMEOUT", 3600))
+
+INGREDIENT_SEARCH_LIMIT = int(os.getenv("INGREDIENT_SEARCH_LIMIT", 20))
+
+SHOPPING_LIST_PDF_FONT = os.getenv(
+    "SHOPPING_LIST_PDF_FONT",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+)
+
+RECIPE_IMAGE_SIZES = {
+    "image": (1200, 1200),
+    "thumbnail": (480, 480),
+}
+RECIPE_IMAGE_FORMAT = os.getenv("RECIPE_IMAGE_FORMAT", "WEBP")
+RECIPE_IMAGE_QUALITY = int(os.getenv("RECIPE_IMAGE_QUALITY", 85))
+RECIPE_IMAGE_WORKERS = int(os.getenv("RECIPE_IMAGE_WORKERS", 2))
+
+JOBS_ALWAYS_EAGER = os.getenv("JOBS_ALWAYS_EAGER") == "True"
+JOBS_MAX_ATTEMPTS = int(os.getenv("JOBS_MAX_ATTEMPTS", 5))
+JOBS_RETRY_DELAY = int(os.getenv("JOBS_RETRY_DELAY", 10))
+JOBS_POLL_INTERVAL = float(os.getenv("JOBS_POLL_INTERVAL", 1))
+JOBS_MAX_BACKOFF = float(os.getenv("JOBS_MAX_BACKOFF", 30))
+JOBS_TIMEOUT = int(os.getenv("JOBS_TIMEOUT", 600))
+
+SERVER_TIMING = os.getenv("SERVER_TIMING") == "True"
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", 10))
+METRICS_ALLOWED_IPS = os.getenv("METRICS_ALLOWED_IPS", "127.0.0.1").split(",")
+QUERY_BUDGET_STRICT = os.getenv("QUERY_BUDGET_STRICT") == "True"
+QUERY_BUDGET_DEFAULT = (
+    int(os.getenv("QUERY_BUDGET_DEFAULT"))
+    if os.getenv("QUERY_BUDGET_DEFAULT")
+    else None
+)
+QUERY_BUDGETS = {
+    "GET api:recipe-list": 8,
+    "GET api:recipe-detail": 8,
+    "GET api:ingredient-list": 2,
+    "GET api:tag-list": 2,
+    "GET users:user-list": 4,
+    "GET users:user-subscriptions": 6,
+}
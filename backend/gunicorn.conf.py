@@ -0,0 +1,9 @@
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+
+if os.getenv("SERVER_INTERFACE", "wsgi") == "asgi":
+    wsgi_app = "backend.asgi:application"
+    worker_class = "uvicorn.workers.UvicornWorker"
+else:
+    wsgi_app = "backend.wsgi:application"
@@ -0,0 +1,61 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections
+from jobs.queue import claim_job, run_job
+
+
+class Command(BaseCommand):
+    help = "Run background jobs from the database queue"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit when the queue is empty",
+        )
+
+    def handle(self, *args, **options):
+        if isinstance(caches["default"], LocMemCache):
+            self.stderr.write(
+                self.style.WARNING(
+                    "Кеш locmem виден только этому процессу: веб-процессы "
+                    "не узнают об изменениях из задач. Задайте "
+                    "CACHE_BACKEND=redis."
+                )
+            )
+        done = failed = 0
+        backoff = settings.JOBS_POLL_INTERVAL
+        try:
+            while True:
+                close_old_connections()
+                try:
+                    job = claim_job()
+                    succeeded = job is not None and run_job(job)
+                except DatabaseError as error:
+                    self.stderr.write(
+                        self.style.ERROR(
+                            f"База данных недоступна ({error}), повтор "
+                            f"через {backoff:g} с"
+                        )
+                    )
+                    time.sleep(backoff)
+                    backoff = min(backoff * 2, settings.JOBS_MAX_BACKOFF)
+                    continue
+                backoff = settings.JOBS_POLL_INTERVAL
+                if job is None:
+                    if options["once"]:
+                        break
+                    time.sleep(settings.JOBS_POLL_INTERVAL)
+                elif succeeded:
+                    done += 1
+                else:
+                    failed += 1
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(
+            self.style.SUCCESS(f"Выполнено задач: {done}, с ошибкой: {failed}")
+        )
@@ -0,0 +1,74 @@
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+
+
+def register(name):
+    def decorator(func):
+        registry[name] = func
+        return func
+
+    return decorator
+
+
+def enqueue(name, **payload):
+    if settings.JOBS_ALWAYS_EAGER:
+        transaction.on_commit(lambda: registry[name](**payload))
+        return None
+    return Job.objects.create(name=name, payload=payload)
+
+
+def claim_job():
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.JOBS_TIMEOUT)
+    with transaction.atomic():
+        job = (
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status=Job.PENDING, run_at__lte=now)
+                | Q(status=Job.RUNNING, updated_at__lt=stale)
+            )
+            .order_by("run_at")
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = Job.RUNNING
+        job.attempts += 1
+        job.save(update_fields=["status", "attempts", "updated_at"])
+    return job
+
+
+def run_job(job):
+    try:
+        func = registry.get(job.name)
+        if func is None:
+            raise LookupError(f"Unknown job {job.name}")
+        func(**job.payload)
+    except Exception:
+        logger.exception("Job %s (%s) failed", job.pk, job.name)
+        job.last_error = traceback.format_exc()
+        if job.attempts >= settings.JOBS_MAX_ATTEMPTS:
+            job.status = Job.FAILED
+        else:
+            job.status = Job.PENDING
+            job.run_at = timezone.now() + timedelta(
+                seconds=settings.JOBS_RETRY_DELAY * 2 ** (job.attempts - 1)
+            )
+        job.save(
+            update_fields=["status", "run_at", "last_error", "updated_at"]
+        )
+        return False
+    job.delete()
+    return True
@@ -1,4 +1,8 @@
+from collections import defaultdict
+
 from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.db import transaction
 
 from .models import (
     Favourite,
@@ -8,6 +12,31 @@ from .models import (
     ShoppingCart,
     Tag,
 )
+from .signals import recipe_ingredients_changed, user_recipes_removed
+
+User = get_user_model()
+
+
+class UserRecipeAdmin(admin.ModelAdmin):
+    list_display = (
+        "user",
+        "recipe",
+    )
+    list_select_related = ("user", "recipe")
+
+    def delete_model(self, request, obj):
+        self.delete_queryset(request, self.model.objects.filter(pk=obj.pk))
+
+    @transaction.atomic
+    def delete_queryset(self, request, queryset):
+        recipe_ids = defaultdict(list)
+        for user_id, recipe_id in queryset.values_list("user_id", "recipe_id"):
+            recipe_ids[user_id].append(recipe_id)
+        queryset.delete()
+        for user in User.objects.filter(pk__in=recipe_ids):
+            user_recipes_removed.send(
+                sender=self.model, user=user, recipe_ids=recipe_ids[user.pk]
+            )
 
 
 @admin.register(Recipe)
@@ -15,7 +44,7 @@ class RecipeAdmin(admin.ModelAdmin):
     list_display = ("name", "id", "author", "added_in_favorites")
 
     def added_in_favorites(self, obj):
-        return obj.favorites.count()
+        return obj.favorites_count
 
     added_in_favorites.short_description = "Количество рецептов в избранных"
     readonly_fields = ("added_in_favorites",)
@@ -45,29 +74,13 @@ class TagAdmin(admin.ModelAdmin):
 
 
 @admin.register(ShoppingCart)
-class ShoppingCartAdmin(admin.ModelAdmin):
-    list_display = (
-        "user",
-        "recipes_list",
-    )
-
-    def recipes_list(self, obj):
-        return ", ".join([recipe.name for recipe in obj.recipe.all()])
-
-    recipes_list.short_description = "Рецепты"
+class ShoppingCartAdmin(UserRecipeAdmin):
+    pass
 
 
 @admin.register(Favourite)
-class FavouriteAdmin(admin.ModelAdmin):
-    list_display = (
-        "user",
-        "recipes_count",
-    )
-
-    def recipes_count(self, obj):
-        return obj.recipe.count()
-
-    recipes_count.short_description = "Количество рецептов"
+class FavouriteAdmin(UserRecipeAdmin):
+    pass
 
 
 @admin.register(RecipeIngredient)
@@ -77,3 +90,19 @@ class RecipeIngredientAdmin(admin.ModelAdmin):
         "ingredient",
         "amount",
     )
+
+    def delete_model(self, request, obj):
+        self.delete_queryset(request, self.model.objects.filter(pk=obj.pk))
+
+    @transaction.atomic
+    def delete_queryset(self, request, queryset):
+        amounts = defaultdict(lambda: defaultdict(int))
+        for recipe_id, ingredient_id, amount in queryset.values_list(
+            "recipe_id", "ingredient_id", "amount"
+        ):
+            amounts[recipe_id][ingredient_id] -= amount
+        queryset.delete()
+        for recipe in Recipe.objects.filter(pk__in=amounts):
+            recipe_ingredients_changed.send(
+                sender=Recipe, recipe=recipe, amounts=dict(amounts[recipe.pk])
+            )
@@ -0,0 +1,91 @@
+import binascii
+import hashlib
+import tempfile
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, features
+
+BASE64_MARKER = ";base64,"
+BASE64_CHUNK_SIZE = 64 * 1024
+ALLOWED_FORMATS = ("JPEG", "PNG", "GIF", "WEBP")
+
+DecodedImage = namedtuple("DecodedImage", ("file", "digest", "extension"))
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.RECIPE_IMAGE_WORKERS,
+    thread_name_prefix="recipe-images",
+)
+
+
+class InvalidImage(ValueError):
+    pass
+
+
+def decode_base64_image(data):
+    marker = data.find(BASE64_MARKER)
+    start = 0 if marker == -1 else marker + len(BASE64_MARKER)
+    digest = hashlib.sha256()
+    file = tempfile.NamedTemporaryFile(suffix=".upload")
+    try:
+        for offset in range(start, len(data), BASE64_CHUNK_SIZE):
+            end = offset + BASE64_CHUNK_SIZE
+            chunk = binascii.a2b_base64(data[offset:end])
+            digest.update(chunk)
+            file.write(chunk)
+        file.flush()
+        file.seek(0)
+        with Image.open(file) as image:
+            if image.format not in ALLOWED_FORMATS:
+                raise InvalidImage(image.format)
+            image.verify()
+            extension = "jpg" if image.format == "JPEG" else image.format
+        file.seek(0)
+    except (
+        binascii.Error,
+        OSError,
+        SyntaxError,
+        Image.DecompressionBombError,
+    ):
+        file.close()
+        raise InvalidImage
+    except InvalidImage:
+        file.close()
+        raise
+    return DecodedImage(file, digest.hexdigest(), extension.lower())
+
+
+def get_image_format():
+    if settings.RECIPE_IMAGE_FORMAT == "WEBP" and features.check("webp"):
+        return "WEBP", "webp"
+    return "JPEG", "jpg"
+
+
+def render_image(path, size, image_format):
+    with Image.open(path) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail(size, Image.Resampling.LANCZOS)
+        if image_format == "JPEG" and image.mode != "RGB":
+            image = image.convert("RGB")
+        elif image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+        buffer = BytesIO()
+        image.save(buffer, image_format, quality=settings.RECIPE_IMAGE_QUALITY)
+    return buffer.getvalue()
+
+
+def render_recipe_images(path, digest):
+    image_format, extension = get_image_format()
+    futures = {
+        field: executor.submit(render_image, path, size, image_format)
+        for field, size in settings.RECIPE_IMAGE_SIZES.items()
+    }
+    return {
+        field: ContentFile(
+            future.result(), name=f"{digest[:32]}_{field}.{extension}"
+        )
+        for field, future in futures.items()
+    }
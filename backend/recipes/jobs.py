@@ -0,0 +1,24 @@
+from django.db import transaction
+from jobs.queue import register
+
+from .images import render_recipe_images
+from .models import Recipe
+
+
+@register("recipes.render_images")
+def render_images(recipe_id, image, digest):
+    recipe = Recipe.objects.filter(pk=recipe_id).first()
+    if recipe is None or recipe.image.name != image:
+        return
+    renditions = render_recipe_images(recipe.image.path, digest)
+
+    with transaction.atomic():
+        recipe = (
+            Recipe.objects.select_for_update().filter(pk=recipe_id).first()
+        )
+        if recipe is None or recipe.image.name != image:
+            return
+        for field, content in renditions.items():
+            getattr(recipe, field).save(content.name, content, save=False)
+        recipe.save(update_fields=list(renditions))
+    recipe.image.storage.delete(image)
@@ -0,0 +1,16 @@
+from django.db import migrations
+
+from ._legacy import copy_legacy_rows
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('recipes', '0003_flat_favourite_shoppingcart'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_legacy_rows, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 3.2 on 2026-10-17 09:12
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_unique_ingredient'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=(
+                'CREATE INDEX recipes_recipe_tags_tag_recipe_idx '
+                'ON recipes_recipe_tags (tag_id, recipe_id);'
+            ),
+            reverse_sql='DROP INDEX recipes_recipe_tags_tag_recipe_idx;',
+        ),
+    ]
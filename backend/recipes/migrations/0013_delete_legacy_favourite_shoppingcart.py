@@ -0,0 +1,33 @@
+from django.db import migrations
+
+from ._legacy import copy_legacy_rows, create_legacy_tables
+
+
+class Migration(migrations.Migration):
+    """Drop the legacy M2M tables once no running code writes to them.
+
+    Rows written by old workers after 0004 are copied once more first.
+    Nothing depends on this migration, so it can be held back with
+    ``migrate recipes 0012`` until the old code is gone. New migrations
+    go before it. Unapplying it recreates the tables empty.
+    """
+
+    atomic = False
+
+    dependencies = [
+        ('recipes', '0012_tag_recipeingredient_ordering'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_legacy_rows, migrations.RunPython.noop),
+        migrations.RunSQL(
+            [
+                'DROP TABLE recipes_favourite_recipe',
+                'DROP TABLE recipes_favourite',
+                'DROP TABLE recipes_shoppingcart_recipe',
+                'DROP TABLE recipes_shoppingcart',
+            ],
+            migrations.RunSQL.noop,
+        ),
+        migrations.RunPython(migrations.RunPython.noop, create_legacy_tables),
+    ]
@@ -0,0 +1,50 @@
+# Shared by the migrations that move favourites and shopping carts off
+# the legacy per-user M2M tables. Django does not load modules that start
+# with an underscore as migrations.
+
+from django.db.migrations.loader import MigrationLoader
+
+BATCH_SIZE = 5000
+
+LEGACY_TABLES = (
+    ('recipes_favourite', 'favourite_id', 'recipes_user_favourite'),
+    ('recipes_shoppingcart', 'shoppingcart_id', 'recipes_user_shopping_cart'),
+)
+
+
+def copy_legacy_rows(apps, schema_editor):
+    """Copy legacy M2M rows into the flat tables in id-range batches.
+
+    Runs outside of a transaction so every batch is committed on its own
+    and no long lock is held on the legacy tables. Rows that are already
+    present are skipped, so the copy can be repeated safely.
+    """
+    for owner_table, owner_column, table in LEGACY_TABLES:
+        through_table = f'{owner_table}_recipe'
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(f'SELECT MAX(id) FROM {through_table}')
+            max_id = cursor.fetchone()[0] or 0
+            for start in range(0, max_id, BATCH_SIZE):
+                cursor.execute(
+                    f'INSERT INTO {table} (user_id, recipe_id) '
+                    'SELECT DISTINCT o.user_id, t.recipe_id '
+                    f'FROM {through_table} t '
+                    f'JOIN {owner_table} o '
+                    f'ON o.id = t.{owner_column} '
+                    'WHERE t.id > %s AND t.id <= %s '
+                    'ON CONFLICT DO NOTHING',
+                    [start, start + BATCH_SIZE],
+                )
+
+
+def create_legacy_tables(apps, schema_editor):
+    """Recreate the empty legacy tables when their drop is unapplied.
+
+    They left the migration state in 0003, so the models are taken from
+    the state before it. This lets 0004 and the copy in the drop
+    migration run again after a rollback.
+    """
+    loader = MigrationLoader(schema_editor.connection)
+    state = loader.project_state(('recipes', '0002_initial'))
+    for model_name in ('Favourite', 'ShoppingCart'):
+        schema_editor.create_model(state.apps.get_model('recipes', model_name))
@@ -28,6 +28,12 @@ class Recipe(models.Model):
         "Время приготовления",
     )
     image = models.ImageField("Изображение", upload_to="img/")
+    thumbnail = models.ImageField("Миниатюра", upload_to="img/", blank=True)
+    favorites_count = models.PositiveIntegerField(
+        "Количество добавлений в избранное", default=0, editable=False
+    )
+    updated_at = models.DateTimeField("Дата изменения", auto_now=True)
+    version = models.PositiveIntegerField("Версия", default=1, editable=False)
 
     class Meta:
         ordering = ["-id"]
@@ -37,6 +43,16 @@ class Recipe(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            return super().save(*args, **kwargs)
+        self.version = models.F("version") + 1
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "updated_at", "version"}
+        super().save(*args, **kwargs)
+        self.refresh_from_db(fields=["version"])
+
 
 class Ingredient(models.Model):
     name = models.CharField("Игридиент", max_length=200)
@@ -46,6 +62,11 @@ class Ingredient(models.Model):
         verbose_name = "Ингредиент"
         verbose_name_plural = "Ингредиенты"
         ordering = ["name"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["name", "measurement_unit"], name="unique_ingredient"
+            )
+        ]
 
     def __str__(self):
         return f"{self.name}, {self.measurement_unit}"
@@ -69,6 +90,7 @@ class Tag(models.Model):
     class Meta:
         verbose_name = "Тег"
         verbose_name_plural = "Теги"
+        ordering = ["id"]
 
     def __str__(self):
         return self.name
@@ -94,6 +116,7 @@ class RecipeIngredient(models.Model):
     class Meta:
         verbose_name = "Ингредиент в рецепте"
         verbose_name_plural = "Ингредиенты в рецептах"
+        ordering = ["id"]
 
     def __str__(self):
         return (
@@ -109,18 +132,30 @@ class Favourite(models.Model):
         related_name="favorites",
         verbose_name="Пользователь",
     )
-    recipe = models.ManyToManyField(
+    recipe = models.ForeignKey(
         Recipe,
+        on_delete=models.CASCADE,
         related_name="favorites",
-        verbose_name="Избранные рецепты",
+        verbose_name="Избранный рецепт",
     )
 
     class Meta:
+        db_table = "recipes_user_favourite"
         verbose_name = "Избранное"
         verbose_name_plural = "Избранное"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "recipe"], name="unique_favourite"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["recipe", "user"], name="favourite_recipe_user_idx"
+            )
+        ]
 
     def __str__(self):
-        return f"Избранные рецепты у {self.user}"
+        return f"{self.recipe} в избранном у {self.user}"
 
 
 class ShoppingCart(models.Model):
@@ -130,15 +165,57 @@ class ShoppingCart(models.Model):
         related_name="shopping_cart",
         verbose_name="Пользователь",
     )
-    recipe = models.ManyToManyField(
+    recipe = models.ForeignKey(
         Recipe,
+        on_delete=models.CASCADE,
         related_name="shopping_cart",
-        verbose_name="Рецепты в корзине",
+        verbose_name="Рецепт в корзине",
     )
 
     class Meta:
+        db_table = "recipes_user_shopping_cart"
         verbose_name = "Корзина"
         verbose_name_plural = "Корзина"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "recipe"], name="unique_shopping_cart"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["recipe", "user"],
+                name="shopping_cart_recipe_user_idx",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.recipe} в корзине у {self.user}"
+
+
+class ShoppingListItem(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="shopping_list",
+        verbose_name="Пользователь",
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name="shopping_list_items",
+        verbose_name="Ингредиент",
+    )
+    total_amount = models.IntegerField("Общее количество")
+
+    class Meta:
+        db_table = "recipes_user_shopping_list"
+        verbose_name = "Ингредиент в списке покупок"
+        verbose_name_plural = "Списки покупок"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "ingredient"], name="unique_shopping_list_item"
+            )
+        ]
 
     def __str__(self):
-        return f"Рецепты в корзине у {self.user}"
+        return f"{self.ingredient} у {self.user}: {self.total_amount}"
@@ -0,0 +1,96 @@
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+
+from .models import RecipeIngredient, ShoppingCart, ShoppingListItem
+
+
+def get_recipe_amounts(recipe_ids):
+    return dict(
+        RecipeIngredient.objects.filter(recipe_id__in=recipe_ids)
+        .order_by()
+        .values("ingredient_id")
+        .annotate(total=Sum("amount"))
+        .values_list("ingredient_id", "total")
+    )
+
+
+def get_cart_users(recipe_id):
+    return list(
+        ShoppingCart.objects.filter(recipe_id=recipe_id).values_list(
+            "user_id", flat=True
+        )
+    )
+
+
+def update_shopping_lists(user_ids, amounts):
+    amounts = {pk: delta for pk, delta in amounts.items() if delta}
+    if not user_ids or not amounts:
+        return
+
+    ShoppingListItem.objects.bulk_create(
+        [
+            ShoppingListItem(
+                user_id=user_id, ingredient_id=ingredient_id, total_amount=0
+            )
+            for user_id in user_ids
+            for ingredient_id, delta in amounts.items()
+            if delta > 0
+        ],
+        ignore_conflicts=True,
+    )
+    items = ShoppingListItem.objects.filter(
+        user_id__in=user_ids, ingredient_id__in=amounts
+    )
+    items.update(
+        total_amount=F("total_amount")
+        + Case(
+            *(
+                When(ingredient_id=ingredient_id, then=Value(delta))
+                for ingredient_id, delta in amounts.items()
+            ),
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+    )
+    if any(delta < 0 for delta in amounts.values()):
+        items.filter(total_amount__lte=0).delete()
+
+
+def get_shopping_list_rows(user_ids=None):
+    rows = RecipeIngredient.objects.all()
+    if user_ids is not None:
+        rows = rows.filter(recipe__shopping_cart__user_id__in=user_ids)
+    else:
+        rows = rows.filter(recipe__shopping_cart__isnull=False)
+    return (
+        rows.order_by()
+        .values_list("recipe__shopping_cart__user", "ingredient")
+        .annotate(total=Sum("amount"))
+        .iterator()
+    )
+
+
+@transaction.atomic
+def rebuild_shopping_lists(user_ids=None, batch_size=5000):
+    items = ShoppingListItem.objects.all()
+    if user_ids is not None:
+        items = items.filter(user_id__in=user_ids)
+    items.delete()
+
+    rows = get_shopping_list_rows(user_ids)
+    created = 0
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return created
+        ShoppingListItem.objects.bulk_create(
+            ShoppingListItem(
+                user_id=user_id,
+                ingredient_id=ingredient_id,
+                total_amount=total,
+            )
+            for user_id, ingredient_id, total in batch
+        )
+        created += len(batch)
@@ -0,0 +1,124 @@
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import Signal, receiver
+
+from .models import Favourite, Recipe, RecipeIngredient, ShoppingCart
+from .shopping_lists import (
+    get_cart_users,
+    get_recipe_amounts,
+    rebuild_shopping_lists,
+    update_shopping_lists,
+)
+
+User = get_user_model()
+
+user_recipes_added = Signal()
+user_recipes_removed = Signal()
+recipe_ingredients_changed = Signal()
+
+
+def update_counter(queryset, field, delta):
+    if delta < 0:
+        queryset = queryset.filter(**{f"{field}__gte": -delta})
+    queryset.update(**{field: F(field) + delta})
+
+
+@receiver(post_save, sender=Recipe)
+def increment_recipes_count(sender, instance, created, **kwargs):
+    if created and instance.author_id:
+        update_counter(
+            User.objects.filter(pk=instance.author_id), "recipes_count", 1
+        )
+
+
+@receiver(post_delete, sender=Recipe)
+def decrement_recipes_count(sender, instance, **kwargs):
+    if instance.author_id:
+        update_counter(
+            User.objects.filter(pk=instance.author_id), "recipes_count", -1
+        )
+
+
+@receiver(post_save, sender=Favourite)
+def increment_favorites_count(sender, instance, created, **kwargs):
+    if created:
+        update_counter(
+            Recipe.objects.filter(pk=instance.recipe_id), "favorites_count", 1
+        )
+
+
+@receiver(user_recipes_added, sender=Favourite)
+def increment_favorites_count_in_bulk(sender, user, recipes, **kwargs):
+    update_counter(
+        Recipe.objects.filter(pk__in=[recipe.pk for recipe in recipes]),
+        "favorites_count",
+        1,
+    )
+
+
+@receiver(user_recipes_removed, sender=Favourite)
+def decrement_favorites_count_in_bulk(sender, user, recipe_ids, **kwargs):
+    update_counter(
+        Recipe.objects.filter(pk__in=recipe_ids), "favorites_count", -1
+    )
+
+
+@receiver(pre_delete, sender=User)
+def decrement_favorites_count_for_user(sender, instance, **kwargs):
+    update_counter(
+        Recipe.objects.filter(favorites__user=instance), "favorites_count", -1
+    )
+
+
+@receiver(post_save, sender=ShoppingCart)
+def add_to_shopping_list(sender, instance, created, **kwargs):
+    if created:
+        update_shopping_lists(
+            [instance.user_id], get_recipe_amounts([instance.recipe_id])
+        )
+    else:
+        rebuild_shopping_lists([instance.user_id])
+
+
+@receiver(user_recipes_added, sender=ShoppingCart)
+def add_to_shopping_list_in_bulk(sender, user, recipes, **kwargs):
+    update_shopping_lists(
+        [user.pk], get_recipe_amounts([recipe.pk for recipe in recipes])
+    )
+
+
+@receiver(user_recipes_removed, sender=ShoppingCart)
+def remove_from_shopping_list_in_bulk(sender, user, recipe_ids, **kwargs):
+    amounts = get_recipe_amounts(recipe_ids)
+    update_shopping_lists(
+        [user.pk], {pk: -total for pk, total in amounts.items()}
+    )
+
+
+@receiver(recipe_ingredients_changed, sender=Recipe)
+def update_cart_shopping_lists(sender, recipe, amounts, **kwargs):
+    update_shopping_lists(get_cart_users(recipe.pk), amounts)
+
+
+@receiver(post_save, sender=RecipeIngredient)
+def update_shopping_lists_on_save(sender, instance, created, **kwargs):
+    user_ids = get_cart_users(instance.recipe_id)
+    if created:
+        update_shopping_lists(
+            user_ids, {instance.ingredient_id: instance.amount}
+        )
+    elif user_ids:
+        rebuild_shopping_lists(user_ids)
+
+
+@receiver(pre_delete, sender=Recipe)
+def remember_cart_users(sender, instance, **kwargs):
+    instance.cart_user_ids = get_cart_users(instance.pk)
+
+
+@receiver(post_delete, sender=Recipe)
+def rebuild_cart_shopping_lists(sender, instance, **kwargs):
+    user_ids = getattr(instance, "cart_user_ids", None)
+    if user_ids:
+        rebuild_shopping_lists(user_ids)
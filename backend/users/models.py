@@ -15,6 +15,12 @@ class User(AbstractUser):
         max_length=254,
         unique=True,
     )
+    recipes_count = models.PositiveIntegerField(
+        "Количество рецептов", default=0, editable=False
+    )
+    subscribers_count = models.PositiveIntegerField(
+        "Количество подписчиков", default=0, editable=False
+    )
 
     class Meta:
         ordering = ["id"]
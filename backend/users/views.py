@@ -1,12 +1,14 @@
 from api.paginations import CustomPagination
 from api.serializers import SubscribeSerializer, UserSerializer
 from django.contrib.auth import get_user_model
+from django.db.models import OuterRef, Prefetch, Subquery
 from django.http import Http404
 from django.shortcuts import get_object_or_404
 from djoser.views import UserViewSet
+from recipes.models import Recipe
 from rest_framework import status
 from rest_framework.decorators import action
-from rest_framework.exceptions import NotFound
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.permissions import (
     IsAuthenticated,
     IsAuthenticatedOrReadOnly,
@@ -24,6 +26,30 @@ class CustomUserViewSet(UserViewSet):
     permission_classes = (IsAuthenticatedOrReadOnly,)
     pagination_class = CustomPagination
 
+    def get_recipes_prefetch(self):
+        limit = self.request.query_params.get("recipes_limit")
+        queryset = Recipe.objects.only(
+            "id", "name", "image", "thumbnail", "cooking_time", "author_id"
+        )
+        if not limit:
+            return Prefetch("recipes", queryset=queryset)
+
+        try:
+            limit = int(limit)
+        except ValueError:
+            limit = -1
+        if limit < 0:
+            raise ValidationError(
+                {"recipes_limit": ["Должно быть неотрицательным числом"]}
+            )
+        latest_recipes = Recipe.objects.filter(
+            author=OuterRef("author")
+        ).values("pk")[:limit]
+        return Prefetch(
+            "recipes",
+            queryset=queryset.filter(pk__in=Subquery(latest_recipes)),
+        )
+
     @action(
         detail=True,
         methods=["post"],
@@ -32,7 +58,10 @@ class CustomUserViewSet(UserViewSet):
     def subscribe(self, request, **kwargs):
         user = request.user
         author_id = self.kwargs.get("id")
-        author = get_object_or_404(User, id=author_id)
+        author = get_object_or_404(
+            User.objects.prefetch_related(self.get_recipes_prefetch()),
+            id=author_id,
+        )
 
         serializer = SubscribeSerializer(
             author, data=request.data, context={"request": request}
@@ -59,7 +88,9 @@ class CustomUserViewSet(UserViewSet):
 
     @action(detail=False, permission_classes=[IsAuthenticated])
     def subscriptions(self, request):
-        queryset = User.objects.filter(subscribing__user=request.user)
+        queryset = User.objects.filter(
+            subscribing__user=request.user
+        ).prefetch_related(self.get_recipes_prefetch())
         pages = self.paginate_queryset(queryset)
         serializer = SubscribeSerializer(
             pages, many=True, context={"request": request}